@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 import os
 import re
+import sys
+import mmap
+import unicodedata
 import subprocess
 import threading
 import time
@@ -8,71 +11,881 @@ import fcntl
 import termios
 import struct
 import pty
-import select
+import ctypes
+import ctypes.util
+import selectors
+import codecs
 import json
-from collections import defaultdict
-from flask import Flask, render_template_string, request, redirect, url_for, jsonify
+import sqlite3
+import uuid
+import socket
+import yaml
+import html
+import gzip
+import zlib
+from urllib.parse import quote
+import mutagen
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+from collections import defaultdict, deque, OrderedDict
+from contextlib import contextmanager
+from flask import Flask, Response, render_template_string, request, redirect, url_for, jsonify
 
 # --- Globale Konfiguration ---
 app = Flask(__name__)
 INPUT_DIR = "/input"
 CONFIG_DIR = "/config"
+LIBRARY_DB = os.path.join(CONFIG_DIR, "library.db")
+READ_POOL_SIZE = 4
+# PTY-Größe des Imports und Scrollback des virtuellen Terminals (Zeilen)
+TERMINAL_COLS = 120
+TERMINAL_ROWS = 40
+SCROLLBACK_LINES = int(os.environ.get("WEBIMPORT_SCROLLBACK", "2000"))
+# Roher Live-Output je Session (Bytes); das vollständige Protokoll landet komprimiert in TRANSCRIPT_DIR
+LIVE_BUFFER_BYTES = int(os.environ.get("WEBIMPORT_LIVE_BUFFER", str(256 * 1024)))
+TRANSCRIPT_DIR = os.path.join(CONFIG_DIR, "webimport_transcripts")
+# Index über alle Protokolle (Ordner, Zeiten, Exit-Code, gewählter Kandidat) für /history
+HISTORY_DB_PATH = os.path.join(CONFIG_DIR, "webimport_history.db")
+HISTORY_PAGE_SIZE = 50
+TRANSCRIPT_PAGE_LINES = 500
+ALBUM_DETAILS_CACHE_SIZE = 256
+# Höchstens so viele Alben pro /album_details?ids=...
+ALBUM_DETAILS_BATCH = 100
+# Maximal gleichzeitig laufende Imports
+MAX_SESSIONS = int(os.environ.get("WEBIMPORT_MAX_SESSIONS", "3"))
+PLUGIN_DIR = os.path.join(CONFIG_DIR, "webimport_plugins")
+OVERLAY_PATH = os.path.join(CONFIG_DIR, "webimport_overlay.yaml")
+DB_LOCK_PATH = os.path.join(CONFIG_DIR, "webimport-db.lock")
+QUEUE_PATH = os.path.join(CONFIG_DIR, "webimport_queue.json")
+# EDITOR-Helfer für beets; blockiert am Socket, bis die YAML in der Web-UI gespeichert/verworfen ist
+WEB_EDITOR_PATH = os.path.join(CONFIG_DIR, "web_editor.py")
+EDITOR_SOCKET_PATH = os.path.join(CONFIG_DIR, "webimport_editor.sock")
+SETTINGS_PATH = os.path.join(CONFIG_DIR, "webimport_settings.json")
+# Auto-Import neuer Ordner: off, interactive, batch oder hold (Voreinstellung, in der UI umschaltbar)
+AUTO_IMPORT_MODES = ('off', 'interactive', 'batch', 'hold')
+AUTO_IMPORT_DEFAULT = os.environ.get("WEBIMPORT_AUTO_IMPORT", "off")
+# Batch-Modus: Treffer ab dieser Ähnlichkeit werden ohne Rückfrage übernommen, der Rest übersprungen
+BATCH_THRESHOLD = float(os.environ.get("WEBIMPORT_BATCH_THRESHOLD", "0.90"))
+BATCH_OVERLAY_PATH = os.path.join(CONFIG_DIR, "webimport_overlay_batch.yaml")
+IMPORT_LOG_DIR = os.path.join(CONFIG_DIR, "webimport_logs")
+CANDIDATE_CACHE_DIR = os.path.join(CONFIG_DIR, "webimport_cache", "candidates")
+CANDIDATE_CACHE_MB = int(os.environ.get("WEBIMPORT_CANDIDATE_CACHE_MB", "100"))
+HTTP_CACHE_PATH = os.path.join(CONFIG_DIR, "webimport_cache", "http.db")
+AUDIO_EXTENSIONS = ('.m4b', '.m4a', '.mp3')
+PRESCAN_CACHE_PATH = os.path.join(CONFIG_DIR, "webimport_cache", "prescan.json")
+PRESCAN_WORKERS = int(os.environ.get("WEBIMPORT_PRESCAN_WORKERS", min(4, os.cpu_count() or 1)))
+# Abgleich des Ordner-Index per scandir, zusätzlich zu inotify (Sekunden)
+FOLDER_RECONCILE_INTERVAL = int(os.environ.get("WEBIMPORT_FOLDER_RECONCILE", "300"))
+# So lange (Sekunden) darf sich ein Ordner nicht ändern, bevor er als fertig geschrieben gilt
+SETTLE_SECONDS = int(os.environ.get("WEBIMPORT_SETTLE_SECONDS", "120"))
+# Hosts (Teilstrings), deren GET-Antworten gecacht werden: Audible-API und Audnexus (beets-audible)
+HTTP_CACHE_HOSTS = os.environ.get("WEBIMPORT_HTTP_CACHE_HOSTS", "audible.,audnex.us")
 
-class BeetsSession:
+# beets liest seine Konfiguration (z.B. timeout) aus BEETSDIR
+os.environ.setdefault("BEETSDIR", CONFIG_DIR)
+from beets.util import displayable_path
+
+# --- beets-Plugin für Imports ---
+# Wird bei jedem Import nach PLUGIN_DIR geschrieben und per Overlay-Config (beet -c) geladen
+BEETS_PLUGIN_SOURCE = '''"""Von webimport.py generiert - Änderungen werden überschrieben"""
+import dataclasses
+import fcntl
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from beets import autotag, importer
+from beets.library import Item
+from beets.plugins import BeetsPlugin
+from beets.ui import Subcommand
+
+
+def source_items(items):
+    """Items aus dem tag_album-Argument: Item-Liste (beets 2.0) oder autotag.Source (neuere Versionen)"""
+    return getattr(items, 'items', items)
+
+
+class ResponseCache:
+    """Persistenter Cache für GET-Antworten der Metadaten-Quellen (TTL + Größenlimit, LRU)"""
+
+    def __init__(self, path, hosts, ttl, max_bytes):
+        self.path = path
+        self.hosts = hosts
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.connect() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, url TEXT, status INTEGER, '
+                       'headers TEXT, body BLOB, size INTEGER, created REAL, accessed REAL)')
+            db.execute('CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER)')
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def wants(self, method, url):
+        host = urlsplit(url).hostname or ''
+        return method.upper() == 'GET' and any(h in host for h in self.hosts)
+
+    def count(self, db, name):
+        db.execute('INSERT INTO stats (name, value) VALUES (?, 1) '
+                   'ON CONFLICT(name) DO UPDATE SET value = value + 1', (name,))
+
+    def install(self):
+        """Schaltet den Cache vor requests.Session.request (genutzt von beets-audible)"""
+        import requests
+        from requests.structures import CaseInsensitiveDict
+        cache = self
+        request = requests.Session.request
+
+        def cached_request(session, method, url, params=None, **kwargs):
+            if not cache.wants(method, url):
+                return request(session, method, url, params=params, **kwargs)
+            full_url = requests.Request(method, url, params=params).prepare().url
+            key = hashlib.sha1(('GET ' + full_url).encode()).hexdigest()
+            now = time.time()
+            try:
+                with cache.connect() as db:
+                    row = db.execute('SELECT status, headers, body FROM responses WHERE key = ? AND created > ?',
+                                     (key, now - cache.ttl)).fetchone()
+                    cache.count(db, 'hits' if row else 'misses')
+                    if row:
+                        db.execute('UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+            except sqlite3.Error:
+                row = None
+            if row:
+                resp = requests.Response()
+                resp.status_code = row[0]
+                resp.headers = CaseInsensitiveDict(json.loads(row[1]))
+                resp._content = row[2]
+                resp.url = full_url
+                resp.reason = 'OK'
+                resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+                return resp
+
+            resp = request(session, method, url, params=params, **kwargs)
+            if resp.status_code == 200:
+                cache.store(key, full_url, resp)
+            return resp
+        requests.Session.request = cached_request
+
+    def store(self, key, url, resp):
+        body = resp.content
+        headers = {k: v for k, v in resp.headers.items()
+                   if k.lower() not in ('content-encoding', 'content-length', 'transfer-encoding')}
+        now = time.time()
+        try:
+            with self.connect() as db:
+                db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                           (key, url, resp.status_code, json.dumps(headers), body, len(body), now, now))
+                db.execute('DELETE FROM responses WHERE created <= ?', (now - self.ttl,))
+                # Größenlimit: am längsten nicht genutzte Einträge zuerst entfernen
+                total = db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+                if total > self.max_bytes:
+                    for old_key, size in db.execute('SELECT key, size FROM responses ORDER BY accessed').fetchall():
+                        if total <= self.max_bytes:
+                            break
+                        db.execute('DELETE FROM responses WHERE key = ?', (old_key,))
+                        total -= size
+                        self.count(db, 'evictions')
+        except sqlite3.Error:
+            pass
+
+
+class WebimportPlugin(BeetsPlugin):
+    """Serialisiert die DB-Schreibphasen parallel laufender Imports per flock"""
+
+    def __init__(self):
+        super().__init__()
+        self.lock_path = os.environ.get('WEBIMPORT_DB_LOCK') or os.path.join(
+            os.environ.get('BEETSDIR', '.'), 'webimport-db.lock')
+        self.lock_file = None
+        self.held = set()
+        self.mutex = threading.Lock()
+        self.register_listener('cli_exit', self.cli_exit)
+        self.register_listener('import_task_choice', self.task_choice)
+
+        # Schreibphase: von task.add (in die DB eintragen) bis task.finalize (nach Verschieben/Speichern)
+        plugin = self
+        for cls in (importer.ImportTask, importer.SingletonImportTask):
+            add = cls.__dict__['add']
+
+            def add_locked(task, lib, add=add):
+                plugin.acquire(task)
+                return add(task, lib)
+            cls.add = add_locked
+
+        finalize = importer.ImportTask.finalize
+
+        def finalize_and_release(task, session):
+            try:
+                return finalize(task, session)
+            finally:
+                plugin.release(task)
+        importer.ImportTask.finalize = finalize_and_release
+
+        # HTTP-Cache für Metadaten-Abfragen
+        http_cache = os.environ.get('WEBIMPORT_HTTP_CACHE')
+        if http_cache:
+            ResponseCache(
+                http_cache,
+                [h.strip() for h in os.environ.get('WEBIMPORT_HTTP_CACHE_HOSTS', '').split(',') if h.strip()],
+                float(os.environ.get('WEBIMPORT_HTTP_CACHE_TTL', '604800')),
+                int(os.environ.get('WEBIMPORT_HTTP_CACHE_MB', '200')) * 1024 * 1024,
+            ).install()
+
+        # Kandidaten-Cache der Vorab-Suche (webimport-lookup) vor tag_album schalten
+        self.candidate_dir = os.environ.get('WEBIMPORT_CANDIDATE_CACHE')
+        self.candidate_ttl = float(os.environ.get('WEBIMPORT_CANDIDATE_TTL', '86400'))
+        self.candidate_max_bytes = int(os.environ.get('WEBIMPORT_CANDIDATE_CACHE_MB', '100')) * 1024 * 1024
+        if self.candidate_dir:
+            tag_album = autotag.tag_album
+
+            def tag_album_cached(items, *args, **kwargs):
+                return plugin.cached_tag_album(tag_album, items, *args, **kwargs)
+            for module in (autotag, importer, sys.modules.get('beets.importer.tasks')):
+                if module is not None and getattr(module, 'tag_album', None) is tag_album:
+                    module.tag_album = tag_album_cached
+
+    def commands(self):
+        cmd = Subcommand('webimport-lookup', help='Kandidaten für einen Ordner vorab suchen und cachen')
+        cmd.func = self.lookup_command
+        return [cmd]
+
+    def lookup_command(self, lib, opts, args):
+        albums_in_dir = getattr(importer, 'albums_in_dir', None) or sys.modules['beets.importer.tasks'].albums_in_dir
+        for path in args:
+            for dirs, paths in albums_in_dir(os.fsencode(path)):
+                items = []
+                for p in paths:
+                    try:
+                        items.append(Item.from_path(p))
+                    except Exception:
+                        pass
+                if items:
+                    # Neuere beets erwarten statt der Item-Liste eine autotag.Source
+                    source = getattr(autotag, 'Source', None)
+                    autotag.tag_album(source.from_items(items) if source else items)
+
+    def candidate_key(self, items):
+        """Schlüssel aus Pfad, Größe und mtime aller Dateien"""
+        h = hashlib.sha1()
+        for item in sorted(source_items(items), key=lambda i: i.path):
+            st = os.stat(item.path)
+            h.update(item.path)
+            h.update(('%d:%d;' % (st.st_size, st.st_mtime_ns)).encode())
+        return h.hexdigest()
+
+    def cached_tag_album(self, tag_album, items, *args, **kwargs):
+        # Nur die erste, automatische Suche cachen - nicht "Enter search"/"Enter ID"
+        if args or any(kwargs.values()):
+            return tag_album(items, *args, **kwargs)
+        try:
+            path = os.path.join(self.candidate_dir, self.candidate_key(items) + '.pickle')
+        except Exception:
+            # Datei nicht lesbar o.ä.: ohne Cache suchen, der Import selbst soll nicht scheitern
+            return tag_album(items, *args, **kwargs)
+        try:
+            if time.time() - os.path.getmtime(path) < self.candidate_ttl:
+                with open(path, 'rb') as f:
+                    return self.remap(pickle.load(f), items)
+        except Exception:
+            pass
+        result = tag_album(items, *args, **kwargs)
+        tmp = path + '.tmp'
+        try:
+            os.makedirs(self.candidate_dir, exist_ok=True)
+            with open(tmp, 'wb') as f:
+                pickle.dump(result, f)
+            os.replace(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self.prune_candidates()
+        return result
+
+    def prune_candidates(self):
+        """Abgelaufene Einträge löschen, dann die ältesten, bis das Größenlimit eingehalten ist"""
+        now = time.time()
+        entries = []
+        try:
+            with os.scandir(self.candidate_dir) as it:
+                for entry in it:
+                    try:
+                        st = entry.stat()
+                        if now - st.st_mtime >= self.candidate_ttl:
+                            os.remove(entry.path)
+                        else:
+                            entries.append((st.st_mtime, st.st_size, entry.path))
+                    except OSError:
+                        pass
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.candidate_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def remap(self, result, items):
+        """Ersetzt die gecachten Items in den Kandidaten durch die Items dieses Tasks"""
+        by_path = {item.path: item for item in source_items(items)}
+        # beets 2.0: (artist, album, Proposal), neuere Versionen geben die Proposal direkt zurück
+        wrapped = not hasattr(result, 'candidates')
+        proposal = result[2] if wrapped else result
+        candidates = []
+        for match in proposal.candidates:
+            changes = {
+                'mapping': {by_path[i.path]: t for i, t in match.mapping.items()},
+                'extra_items': [by_path[i.path] for i in match.extra_items],
+            }
+            if hasattr(match, '_replace'):
+                candidates.append(match._replace(**changes))
+            else:
+                candidates.append(dataclasses.replace(match, **changes))
+        proposal = proposal._replace(candidates=candidates)
+        if wrapped:
+            return result[:2] + (proposal,)
+        return proposal
+
+    def acquire(self, task):
+        with self.mutex:
+            if not self.held:
+                self.lock_file = open(self.lock_path, 'a')
+                fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+            self.held.add(id(task))
+
+    def release(self, task=None):
+        with self.mutex:
+            if task is None:
+                self.held.clear()
+            else:
+                self.held.discard(id(task))
+            if not self.held and self.lock_file is not None:
+                fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+                self.lock_file.close()
+                self.lock_file = None
+
+    def cli_exit(self, lib):
+        self.release()
+
+    def task_choice(self, session, task):
+        """Meldet die Entscheidung je Album als Marker an webimport (Import-Historie)"""
+        choice = getattr(task.choice_flag, 'name', str(task.choice_flag))
+        data = {'choice': choice.lower()}
+        match = getattr(task, 'match', None)
+        if choice == 'APPLY' and match is not None:
+            info = match.info
+            data.update(
+                artist=info.artist,
+                album=getattr(info, 'album', None) or getattr(info, 'title', None),
+                id=getattr(info, 'album_id', None) or getattr(info, 'track_id', None),
+                source=getattr(info, 'data_source', None),
+                distance=round(float(match.distance), 3),
+            )
+        elif choice == 'ASIS':
+            data.update(artist=getattr(task, 'cur_artist', None), album=getattr(task, 'cur_album', None))
+        print('[[WEBIMPORT_CHOICE:' + json.dumps(data, ensure_ascii=False) + ']]', flush=True)
+'''
+
+def plugin_env(env):
+    """Setzt die Umgebungsvariablen, über die webimport das beets-Plugin konfiguriert"""
+    env["WEBIMPORT_DB_LOCK"] = DB_LOCK_PATH
+    env["WEBIMPORT_CANDIDATE_CACHE"] = CANDIDATE_CACHE_DIR
+    env["WEBIMPORT_CANDIDATE_CACHE_MB"] = str(CANDIDATE_CACHE_MB)
+    env["WEBIMPORT_HTTP_CACHE"] = HTTP_CACHE_PATH
+    env["WEBIMPORT_HTTP_CACHE_HOSTS"] = HTTP_CACHE_HOSTS
+    return env
+
+WEB_EDITOR_SOURCE = '''#!/usr/bin/env python3
+"""Von webimport.py generiert - Änderungen werden überschrieben"""
+import json
+import os
+import socket
+import sys
+
+path = sys.argv[-1]
+conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+conn.connect(os.environ['WEBIMPORT_EDITOR_SOCKET'])
+request = {'session': os.environ.get('WEBIMPORT_SESSION'), 'path': path}
+conn.sendall(json.dumps(request).encode('utf-8') + b'\\n')
+# webimport antwortet, sobald die Datei gespeichert oder die Bearbeitung abgebrochen wurde
+sys.exit(0 if conn.recv(16) else 1)
+'''
+
+def get_http_cache_stats():
+    """Treffer/Fehlgriffe und Größe des Metadaten-Caches"""
+    stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'entries': 0, 'bytes': 0}
+    if not os.path.exists(HTTP_CACHE_PATH):
+        return stats
+    try:
+        db = sqlite3.connect(f"file:{HTTP_CACHE_PATH}?mode=ro", uri=True, timeout=2)
+        try:
+            stats.update(db.execute('SELECT name, value FROM stats').fetchall())
+            stats['entries'], stats['bytes'] = db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+        finally:
+            db.close()
+    except sqlite3.Error:
+        pass
+    return stats
+
+def write_if_changed(path, content):
+    """Schreibt eine Datei nur, wenn sich der Inhalt geändert hat"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return
+    except OSError:
+        pass
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+def merge_config(base, extra):
+    """Mischt verschachtelte Dicts (extra gewinnt)"""
+    for key, value in extra.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            merge_config(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+def load_user_config():
+    """Liest die config.yaml des Benutzers (leer, wenn nicht lesbar)"""
+    try:
+        with open(os.path.join(CONFIG_DIR, "config.yaml"), 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError):
+        return {}
+
+def ensure_beets_overlay(extra=None, path=OVERLAY_PATH):
+    """Schreibt webimport-Plugin und Overlay-Config, gibt den Pfad für beet -c zurück"""
+    os.makedirs(PLUGIN_DIR, exist_ok=True)
+    write_if_changed(os.path.join(PLUGIN_DIR, "webimport.py"), BEETS_PLUGIN_SOURCE)
+    
+    # Listen aus dem Overlay ersetzen die der config.yaml, daher bestehende Plugins übernehmen
+    user_config = load_user_config()
+    plugins = user_config.get('plugins') or []
+    if isinstance(plugins, str):
+        plugins = plugins.split()
+    pluginpath = user_config.get('pluginpath') or []
+    if isinstance(pluginpath, str):
+        pluginpath = [pluginpath]
+    
+    overlay = {
+        'pluginpath': [p for p in pluginpath if p != PLUGIN_DIR] + [PLUGIN_DIR],
+        'plugins': [p for p in plugins if p != 'webimport'] + ['webimport'],
+    }
+    if extra:
+        merge_config(overlay, extra)
+    write_if_changed(path, yaml.safe_dump(overlay, default_flow_style=False))
+    return path
+
+def batch_overlay():
+    """Overlay für unbeaufsichtigte Imports (beet import -q)"""
+    return ensure_beets_overlay({
+        'import': {'quiet_fallback': 'skip', 'timid': False},
+        # beets übernimmt im Quiet-Modus nur Treffer mit Distanz unter strong_rec_thresh
+        'match': {'strong_rec_thresh': round(1 - BATCH_THRESHOLD, 4)},
+    }, path=BATCH_OVERLAY_PATH)
+
+@contextmanager
+def db_write_lock():
+    """Exklusiver Schreib-Lock auf library.db, geteilt mit dem Plugin der laufenden Imports"""
+    with open(DB_LOCK_PATH, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+class PtyLoop:
+    """Ein gemeinsamer I/O-Thread für alle PTY-Master und Prozess-Enden (epoll via selectors)"""
+    READ_SIZE = 65536
+    
     def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        self.lock = threading.Lock()
+        self.pending = []
+        self.thread = None
+        # Self-Pipe, um den Loop für (De-)Registrierungen aufzuwecken
+        self.wake_r, self.wake_w = os.pipe()
+        os.set_blocking(self.wake_r, False)
+        os.set_blocking(self.wake_w, False)
+        self.selector.register(self.wake_r, selectors.EVENT_READ, None)
+    
+    def add(self, sess, master_fd, process):
+        """Übernimmt PTY und Prozess einer Session; Output landet in sess._feed, das Ende in sess._finished"""
+        pidfd = None
+        if hasattr(os, 'pidfd_open'):
+            try:
+                pidfd = os.pidfd_open(process.pid)
+            except OSError:
+                pidfd = None
+        self._call(lambda: self._register(sess, master_fd, process, pidfd))
+    
+    def _call(self, fn):
+        with self.lock:
+            self.pending.append(fn)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+        try:
+            os.write(self.wake_w, b'x')
+        except BlockingIOError:
+            pass
+    
+    def _register(self, sess, master_fd, process, pidfd):
+        entry = {'sess': sess, 'fd': master_fd, 'process': process, 'pidfd': pidfd}
+        self.selector.register(master_fd, selectors.EVENT_READ, ('pty', entry))
+        if pidfd is not None:
+            self.selector.register(pidfd, selectors.EVENT_READ, ('exit', entry))
+    
+    def _run(self):
+        while True:
+            for key, _ in self.selector.select():
+                if key.data is None:
+                    try:
+                        while os.read(self.wake_r, 4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    with self.lock:
+                        pending, self.pending = self.pending, []
+                    for fn in pending:
+                        try:
+                            fn()
+                        except Exception as e:
+                            print(f"Error in PTY loop callback: {e}")
+                    continue
+                
+                kind, entry = key.data
+                if entry['fd'] is None:
+                    continue  # in diesem Durchlauf schon beendet
+                try:
+                    if kind == 'pty':
+                        if not self._drain(entry, once=True):
+                            self._finish(entry)
+                    else:
+                        # Prozess beendet: restlichen Output lesen, dann aufräumen
+                        self._drain(entry)
+                        self._finish(entry)
+                except Exception as e:
+                    # Nur diese Session aufgeben (z.B. OSError beim Protokoll, Platte voll);
+                    # der Loop bedient alle anderen weiter
+                    print(f"Error reading PTY of session {entry['sess'].id}: {e}")
+                    if entry['fd'] is not None:
+                        self._finish(entry)
+    
+    def _drain(self, entry, once=False):
+        """Liest verfügbaren Output; False bei EOF/EIO (Slave-Seite geschlossen)"""
+        while True:
+            try:
+                data = os.read(entry['fd'], self.READ_SIZE)
+            except BlockingIOError:
+                return True
+            except OSError:
+                return False
+            if not data:
+                return False
+            entry['sess']._feed(data)
+            if once:
+                return True
+    
+    def _finish(self, entry):
+        for fd in (entry['fd'], entry['pidfd']):
+            if fd is None:
+                continue
+            try:
+                self.selector.unregister(fd)
+            except (KeyError, ValueError):
+                pass
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        entry['fd'] = entry['pidfd'] = None
+        # Ohne pidfd meldet EIO das Ende; Prozess dann in einem eigenen Thread einsammeln
+        process = entry['process']
+        threading.Thread(target=lambda: entry['sess']._finished(process, process.wait()), daemon=True).start()
+
+pty_loop = PtyLoop()
+
+class ByteRing:
+    """Ringpuffer fester Größe; Offsets zählen alle je geschriebenen Bytes (monoton)"""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.buf = bytearray(capacity)
+        self.start = 0  # Offset des ältesten noch vorhandenen Bytes
+        self.end = 0    # Offset hinter dem zuletzt geschriebenen Byte
+    
+    def clear(self):
+        self.start = self.end
+    
+    def write(self, data):
+        self.end += len(data)
+        data = memoryview(data)[-self.capacity:]
+        pos = (self.end - len(data)) % self.capacity
+        first = min(len(data), self.capacity - pos)
+        self.buf[pos:pos + first] = data[:first]
+        self.buf[:len(data) - first] = data[first:]
+        self.start = max(self.start, self.end - self.capacity)
+    
+    def read(self, since):
+        """Bytes ab Offset `since` (mindestens ab start) bis zum Ende"""
+        since = min(max(since, self.start), self.end)
+        length = self.end - since
+        pos = since % self.capacity
+        first = min(length, self.capacity - pos)
+        return bytes(self.buf[pos:pos + first]) + bytes(self.buf[:length - first])
+
+class TranscriptWriter:
+    """Hängt den Output eines Imports komprimiert an eine .log.gz-Datei an"""
+    # Spätestens nach so vielen Sekunden wird synchronisiert (lesbar auch bei Absturz)
+    FLUSH_INTERVAL = 5
+    
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.file = gzip.open(path, 'ab')
+        self.flushed = time.time()
+    
+    def write(self, data):
+        self.file.write(data)
+        if time.time() - self.flushed > self.FLUSH_INTERVAL:
+            self.file.flush(zlib.Z_SYNC_FLUSH)
+            self.flushed = time.time()
+    
+    def close(self):
+        self.file.close()
+
+class ImportHistory:
+    """Index aller Imports in SQLite; die Protokolle selbst liegen als .log.gz in TRANSCRIPT_DIR.
+    
+    Einträge werden nur angelegt und beim Prozessende ergänzt, nie gelöscht.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = None
+    
+    def _db(self):
+        """Verbindung beim ersten Zugriff öffnen; offene Einträge stammen dann aus einem früheren Lauf"""
+        if self.conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            self.conn.row_factory = sqlite3.Row
+            self.conn.execute('CREATE TABLE IF NOT EXISTS imports (id INTEGER PRIMARY KEY, session TEXT, '
+                              'folder TEXT, mode TEXT, started REAL, finished REAL, exit_code INTEGER, '
+                              'choices TEXT, transcript TEXT, size INTEGER)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS imports_started ON imports (started)')
+            for row in self.conn.execute('SELECT id, transcript FROM imports WHERE finished IS NULL').fetchall():
+                try:
+                    st = os.stat(row['transcript'])
+                    finished, size = st.st_mtime, st.st_size
+                except OSError:
+                    finished, size = None, 0
+                self.conn.execute('UPDATE imports SET finished = COALESCE(?, started), size = ? WHERE id = ?',
+                                  (finished, size, row['id']))
+            self.conn.commit()
+        return self.conn
+    
+    def begin(self, session_id, folder, mode, started, transcript):
+        """Legt den Eintrag für einen gestarteten Import an; gibt dessen ID zurück"""
+        with self.lock:
+            db = self._db()
+            cur = db.execute('INSERT INTO imports (session, folder, mode, started, choices, transcript) '
+                             'VALUES (?, ?, ?, ?, ?, ?)', (session_id, folder, mode, started, '[]', transcript))
+            db.commit()
+            return cur.lastrowid
+    
+    def finish(self, entry_id, exit_code, choices):
+        with self.lock:
+            db = self._db()
+            row = db.execute('SELECT transcript FROM imports WHERE id = ?', (entry_id,)).fetchone()
+            try:
+                size = os.path.getsize(row['transcript'])
+            except (OSError, TypeError):
+                size = 0
+            db.execute('UPDATE imports SET finished = ?, exit_code = ?, choices = ?, size = ? WHERE id = ?',
+                       (time.time(), exit_code, json.dumps(choices, ensure_ascii=False), size, entry_id))
+            db.commit()
+    
+    def _entry(self, row):
+        entry = dict(row)
+        entry['choices'] = json.loads(entry['choices'] or '[]')
+        return entry
+    
+    def search(self, query='', page=0, per_page=HISTORY_PAGE_SIZE):
+        """Neueste Imports zuerst, gefiltert nach Ordner oder gewähltem Album; gibt (Einträge, Gesamtzahl) zurück"""
+        where, params = '', ()
+        if query:
+            pattern = '%' + query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            where = "WHERE folder LIKE ? ESCAPE '\\' OR choices LIKE ? ESCAPE '\\'"
+            params = (pattern, pattern)
+        with self.lock:
+            db = self._db()
+            total = db.execute(f'SELECT COUNT(*) FROM imports {where}', params).fetchone()[0]
+            rows = db.execute(f'SELECT * FROM imports {where} ORDER BY started DESC, id DESC LIMIT ? OFFSET ?',
+                              params + (per_page, page * per_page)).fetchall()
+        return [self._entry(row) for row in rows], total
+    
+    def get(self, entry_id):
+        with self.lock:
+            row = self._db().execute('SELECT * FROM imports WHERE id = ?', (entry_id,)).fetchone()
+        return self._entry(row) if row else None
+    
+    def read_transcript(self, entry):
+        """Liefert das Protokoll als Text in Blöcken, ohne es ganz in den Speicher zu laden"""
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        try:
+            with gzip.open(entry['transcript'], 'rb') as f:
+                while True:
+                    try:
+                        chunk = f.read(64 * 1024)
+                    except EOFError:
+                        break  # Import läuft noch: Datei endet nach dem letzten Sync-Flush
+                    if not chunk:
+                        break
+                    yield decoder.decode(chunk)
+        except OSError:
+            return
+        yield decoder.decode(b'', True)
+    
+    def transcript_page(self, entry, page, lines=TRANSCRIPT_PAGE_LINES):
+        """Zeilen der Seite `page` des Protokolls; gibt (Zeilen, weitere Seiten vorhanden) zurück"""
+        first = page * lines
+        result = []
+        number = 0
+        rest = ''
+        for chunk in self.read_transcript(entry):
+            parts = (rest + chunk).split('\n')
+            rest = parts.pop()
+            for line in parts:
+                if number >= first + lines:
+                    return result, True
+                if number >= first:
+                    result.append(line)
+                number += 1
+        if rest:
+            if number >= first + lines:
+                return result, True
+            if number >= first:
+                result.append(rest)
+        return result, False
+
+import_history = ImportHistory(HISTORY_DB_PATH)
+
+def transcript_html(lines):
+    """Protokollzeilen als HTML; \\r-Fortschrittszeilen zeigen nur ihren letzten Stand"""
+    renderer = AnsiRenderer()
+    return ''.join(renderer.feed(line.rstrip('\r').rsplit('\r', 1)[-1] + '\n') for line in lines)
+
+# Marker des Plugins samt Zeilenende (siehe WebimportPlugin.task_choice)
+CHOICE_PREFIX = '[[WEBIMPORT_CHOICE:'
+CHOICE_MARKER = re.compile(r'\[\[WEBIMPORT_CHOICE:(\{.*?\})\]\]\r?\n?')
+# Unvollständiger Marker am Chunk-Ende wird höchstens so lange (Zeichen) zurückgehalten
+CHOICE_TAIL_LIMIT = 65536
+
+class BeetsSession:
+    # Ohne neuen Output so lange (Sekunden) gilt ein offener Prompt als "wartet auf Eingabe"
+    INPUT_IDLE = 1.5
+    
+    def __init__(self, session_id=None, on_finished=None):
+        self.id = session_id or uuid.uuid4().hex[:8]
+        self.on_finished = on_finished
+        self.started = None
+        self.last_output = None
         self.process = None
         self.master_fd = None
-        self.output_buffer = []
+        # Roher Output mit fester Obergrenze (Ende für /terminal und waiting_for_input)
+        self.output = ByteRing(LIVE_BUFFER_BYTES)
+        self.transcript = None
+        # Bildschirm wie ihn ein echtes Terminal zeigen würde
+        self.screen = TerminalScreen()
         self.current_folder = None
         self.lock = threading.Lock()
+        # Weckt SSE-Streams bei neuem Output, Editor-Aufruf und Prozessende
+        self.changed = threading.Condition(self.lock)
+        self.version = 0
+        self.exit_code = None
         self.pending_editor_path = None
+        self.decoder = None
+        self.folder = None
+        self.mode = 'interactive'
+        self.log_path = None
+        self.history_id = None
+        self.choices = []
+        self.choice_tail = ''
         
-    def start_import(self, folder):
-        """Startet einen neuen Import mit pseudo-terminal"""
+    def start_import(self, folder, mode='interactive'):
+        """Startet einen neuen Import mit pseudo-terminal (mode: interactive oder batch)"""
         if self.process and self.process.poll() is None:
             return False
             
-        self.output_buffer = []
+        self.started = time.time()
+        with self.lock:
+            self.output.clear()
+            # Seq läuft über Imports weiter, damit Clients den Wechsel als Reset erkennen
+            self.screen = TerminalScreen(seq=self.screen.seq + 1)
+            if self.transcript:
+                self.transcript.close()
+            stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started))
+            self.transcript = TranscriptWriter(os.path.join(TRANSCRIPT_DIR, f"{stamp}-{self.id}.log.gz"))
+            self.history_id = import_history.begin(self.id, folder, mode, self.started, self.transcript.path)
+            self.choices = []
+            self.choice_tail = ''
+            self.exit_code = None
+            self._notify()
         self.current_folder = folder
+        self.folder = folder
+        self.mode = mode
         full_path = os.path.join(INPUT_DIR, folder)
         
         # Environment setup
         env = os.environ.copy()
         env["BEETSDIR"] = CONFIG_DIR
+        plugin_env(env)
         env["TERM"] = "xterm-256color"
-        env["COLUMNS"] = "120"
-        env["LINES"] = "40"
+        env["COLUMNS"] = str(TERMINAL_COLS)
+        env["LINES"] = str(TERMINAL_ROWS)
 
         # Web-Editor-Helfer und EDITOR setzen
-        helper_path = os.path.join(CONFIG_DIR, "web_editor.py")
-        if not os.path.exists(helper_path):
-            with open(helper_path, "w", encoding="utf-8") as f:
-                f.write(
-                    "#!/usr/bin/env python3\n"
-                    "import sys, os, time\n"
-                    "p = sys.argv[-1]\n"
-                    "print(f\"[[OPEN_YAML:{p}]]\")\n"
-                    "done = p + '.done'\n"
-                    "while not os.path.exists(done):\n"
-                    "    time.sleep(0.2)\n"
-                    "try:\n"
-                    "    os.remove(done)\n"
-                    "except Exception:\n"
-                    "    pass\n"
-                )
-            os.chmod(helper_path, 0o755)
-        env["EDITOR"] = f"/usr/bin/env python3 {helper_path}"
+        write_if_changed(WEB_EDITOR_PATH, WEB_EDITOR_SOURCE)
+        os.chmod(WEB_EDITOR_PATH, 0o755)
+        env["EDITOR"] = f"/usr/bin/env python3 {WEB_EDITOR_PATH}"
+        env["WEBIMPORT_EDITOR_SOCKET"] = EDITOR_SOCKET_PATH
+        env["WEBIMPORT_SESSION"] = self.id
         
         # Erstelle pseudo-terminal
         self.master_fd, slave_fd = pty.openpty()
         
         # Terminal-Größe
-        winsize = struct.pack("HHHH", 40, 120, 0, 0)
+        winsize = struct.pack("HHHH", TERMINAL_ROWS, TERMINAL_COLS, 0, 0)
         fcntl.ioctl(slave_fd, termios.TIOCSWINSZ, winsize)
         
-        # Prozess starten (-t = timid)
+        if mode == 'batch':
+            # -q: keine Rückfragen, übersprungene Alben landen im Import-Log
+            os.makedirs(IMPORT_LOG_DIR, exist_ok=True)
+            self.log_path = os.path.join(IMPORT_LOG_DIR, f"{self.id}.log")
+            cmd = ["beet", "-c", batch_overlay(), "import", "-q", "-l", self.log_path, full_path]
+        else:
+            # -t = timid
+            cmd = ["beet", "-c", ensure_beets_overlay(), "import", "-t", full_path]
+        
+        # Prozess starten
         self.process = subprocess.Popen(
-            ["beet", "import", "-t", full_path],
+            cmd,
             stdin=slave_fd,
             stdout=slave_fd,
             stderr=slave_fd,
@@ -86,43 +899,100 @@ class BeetsSession:
         flags = fcntl.fcntl(self.master_fd, fcntl.F_GETFL)
         fcntl.fcntl(self.master_fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
         
-        # Output-Reader
-        threading.Thread(target=self._read_output, daemon=True).start()
+        # Output liest der gemeinsame PTY-Loop; UTF-8-Sequenzen können über Reads hinweg geteilt sein
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        pty_loop.add(self, self.master_fd, self.process)
         
         return True
     
-    def _read_output(self):
-        """Liest kontinuierlich Output vom PTY"""
-        while self.process and self.process.poll() is None:
-            try:
-                ready, _, _ = select.select([self.master_fd], [], [], 0.1)
-                if ready:
-                    data = os.read(self.master_fd, 4096)
-                    if data:
-                        text = data.decode('utf-8', errors='replace')
-
-                        # Editor-Marker erkennen und puffern, Marker aus Output entfernen
-                        m = re.findall(r'\[\[OPEN_YAML:(.*?)\]\]', text)
-                        if m:
-                            with self.lock:
-                                self.pending_editor_path = m[-1]
-                            text = re.sub(r'\[\[OPEN_YAML:.*?\]\]', '', text)
-
-                        with self.lock:
-                            self.output_buffer.append(text)
-                            if len(self.output_buffer) > 500:
-                                self.output_buffer = self.output_buffer[-400:]
-            except OSError:
-                break
-                
-        # Cleanup
-        if self.master_fd:
-            try:
-                os.close(self.master_fd)
-            except:
-                pass
+    def _feed(self, data):
+        """Nimmt PTY-Output aus dem PTY-Loop entgegen"""
+        text = self.decoder.decode(data)
+        text, choices = self._take_choices(text)
+        if not text and not choices:
+            return
+        
+        with self.lock:
+            self.choices.extend(choices)
+            self.screen.feed(text)
+            data = text.encode('utf-8')
+            self.output.write(data)
+            if self.transcript:
+                self.transcript.write(data)
+            self.last_output = time.time()
+            self._notify()
+    
+    def _take_choices(self, text):
+        """Entfernt die vom Plugin gemeldeten Entscheidungen (Import-Historie) aus dem Output.
+        
+        Ein am Chunk-Ende angeschnittener Marker wird zurückgehalten und dem nächsten Chunk vorangestellt.
+        """
+        text = self.choice_tail + text
+        self.choice_tail = ''
+        hold = len(text)
+        start = text.rfind(CHOICE_PREFIX)
+        if start >= 0:
+            m = CHOICE_MARKER.match(text, start)
+            if m is None or (m.end() == len(text) and not m.group(0).endswith('\n')):
+                hold = start  # Marker oder dessen Zeilenende fehlt noch
+        else:
+            # Anfang des Markers; das Plugin schreibt ihn immer an den Zeilenanfang
+            for k in range(min(len(CHOICE_PREFIX) - 1, len(text)), 0, -1):
+                pos = len(text) - k
+                if text.endswith(CHOICE_PREFIX[:k]) and (pos == 0 or text[pos - 1] == '\n'):
+                    hold = pos
+                    break
+        if len(text) - hold <= CHOICE_TAIL_LIMIT:
+            text, self.choice_tail = text[:hold], text[hold:]
+        
+        choices = []
+        if CHOICE_PREFIX in text:
+            for raw in CHOICE_MARKER.findall(text):
+                try:
+                    choices.append(json.loads(raw))
+                except ValueError:
+                    pass
+            text = CHOICE_MARKER.sub('', text)
+        return text, choices
+    
+    def open_editor(self, path):
+        """Vom Editor-Kanal aufgerufen, sobald beets eine YAML zum Bearbeiten übergibt"""
+        with self.lock:
+            self.pending_editor_path = path
+            self._notify()
+    
+    def _finished(self, process, returncode):
+        """Wird vom PTY-Loop nach Prozessende aufgerufen"""
+        if process is not self.process:
+            return  # inzwischen läuft schon ein neuer Import
         self.master_fd = None
+        if self.pending_editor_path:
+            editor_channel.release(self.pending_editor_path)
+            self.pending_editor_path = None
         self.current_folder = None
+        library_cache.invalidate()
+        album_details_cache.invalidate()
+        with self.lock:
+            self.exit_code = returncode
+            if self.transcript:
+                self.transcript.close()
+                self.transcript = None
+            self._notify()
+        if self.history_id is not None:
+            import_history.finish(self.history_id, returncode, self.choices)
+        if self.on_finished:
+            self.on_finished(self)
+    
+    def _notify(self):
+        """Weckt wartende Streams; Aufruf nur mit gehaltenem Lock"""
+        self.version += 1
+        self.changed.notify_all()
+    
+    def wait_for_change(self, version, timeout):
+        """Blockiert bis sich der Zustand seit `version` geändert hat, gibt die neue Version zurück"""
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
     
     def send_input(self, text):
         """Sendet Input an den Prozess"""
@@ -136,13 +1006,24 @@ class BeetsSession:
         return False
     
     def get_output(self):
-        """Gibt den aktuellen Output zurück"""
+        """Gibt den gepufferten Output zurück (ältester Teil ggf. verworfen, siehe transcript)"""
+        with self.lock:
+            data = self.output.read(self.output.start)
+        # Am Pufferanfang abgeschnittene UTF-8-Sequenz überspringen
+        skip = 0
+        while skip < min(3, len(data)) and data[skip] & 0xC0 == 0x80:
+            skip += 1
+        return data[skip:].decode('utf-8', 'replace')
+    
+    def get_screen(self, since=None):
+        """Geänderte Terminal-Zeilen seit Seq `since` (siehe TerminalScreen.changes)"""
         with self.lock:
-            return ''.join(self.output_buffer)
+            return self.screen.changes(since)
     
     def stop_import(self):
         """Stoppt den laufenden Import"""
-        if self.process:
+        # PTY schließt der PTY-Loop, sobald der Prozess beendet ist
+        if self.process and self.process.poll() is None:
             try:
                 os.write(self.master_fd, b'\x03')  # Ctrl+C
                 time.sleep(0.5)
@@ -153,23 +1034,501 @@ class BeetsSession:
                     self.process.kill()
             except:
                 pass
-            self.process = None
-        
-        if self.master_fd:
-            try:
-                os.close(self.master_fd)
-            except:
-                pass
-            self.master_fd = None
             
     def is_running(self):
         """Prüft ob ein Import läuft"""
         return self.process and self.process.poll() is None
+    
+    def skipped_paths(self):
+        """Im Batch-Modus übersprungene Pfade laut Import-Log"""
+        skipped = []
+        if not self.log_path:
+            return skipped
+        try:
+            with open(self.log_path, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    status, _, paths = line.rstrip('\n').partition(' ')
+                    if status in ('skip', 'duplicate-skip'):
+                        skipped.append(paths)
+        except OSError:
+            pass
+        return skipped
+    
+    def waiting_for_input(self):
+        """Heuristik: Editor offen oder letzte Ausgabe ist ein Prompt ohne Zeilenumbruch und seitdem Ruhe"""
+        if not self.is_running():
+            return False
+        if self.pending_editor_path:
+            return True
+        with self.lock:
+            tail = self.output.read(self.output.end - 1)
+            idle = self.last_output is not None and time.time() - self.last_output > self.INPUT_IDLE
+        return idle and not tail.endswith(b'\n')
+
+class SessionManager:
+    """Verwaltet parallel laufende Import-Sessions"""
+    KEEP_FINISHED = 10
+    
+    def __init__(self, max_sessions):
+        self.max_sessions = max_sessions
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+        # Callbacks bei Prozessende einer Session (z.B. Warteschlange weiterschalten)
+        self.listeners = []
+    
+    def start(self, folder, mode='interactive'):
+        """Startet einen Import in einer neuen Session; None wenn Limit erreicht oder Ordner schon läuft"""
+        with self.lock:
+            running = self.running()
+            if len(running) >= self.max_sessions:
+                return None
+            if any(s.folder == folder for s in running):
+                return None
+            sess = BeetsSession(on_finished=self._session_finished)
+            if not sess.start_import(folder, mode):
+                return None
+            self.sessions[sess.id] = sess
+            self._prune()
+            return sess
+    
+    def _session_finished(self, sess):
+        for listener in list(self.listeners):
+            listener(sess)
+    
+    def _prune(self):
+        finished = [sid for sid, s in self.sessions.items() if not s.is_running()]
+        for sid in finished[:-self.KEEP_FINISHED]:
+            del self.sessions[sid]
+    
+    def get(self, session_id):
+        return self.sessions.get(session_id)
+    
+    def running(self):
+        return [s for s in list(self.sessions.values()) if s.is_running()]
+    
+    def all(self):
+        return list(self.sessions.values())
+    
+    def current(self):
+        """Zuletzt gestartete Session (für die alten Routen ohne Session-ID)"""
+        running = self.running()
+        if running:
+            return running[-1]
+        sessions = self.all()
+        return sessions[-1] if sessions else BeetsSession()
+    
+    def next_session(self):
+        """Session, die als nächstes Aufmerksamkeit braucht: wartet auf Eingabe, sonst zuletzt gestartet"""
+        running = self.running()
+        for s in running:
+            if s.waiting_for_input():
+                return s
+        return running[-1] if running else None
+    
+    def find_editor(self, path):
+        """Session, deren Editor gerade `path` geöffnet hat"""
+        for s in self.all():
+            if s.pending_editor_path == path:
+                return s
+        return None
+
+sessions = SessionManager(MAX_SESSIONS)
+
+class EditorChannel:
+    """Unix-Socket für web_editor.py: der Helfer meldet Session und YAML-Pfad und blockiert,
+    bis save_edit/cancel_edit ihn über release() weckt"""
+    # So lange (Sekunden) darf ein Helfer für seine Anmeldung brauchen
+    HELLO_TIMEOUT = 5
+    
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.waiting = {}  # YAML-Pfad -> Verbindung des wartenden Helfers
+        self.server = None
+        self.thread = None
+    
+    def start(self):
+        if self.thread is not None:
+            return
+        try:
+            os.unlink(self.path)  # Socket eines früheren Laufs
+        except FileNotFoundError:
+            pass
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.path)
+        os.chmod(self.path, 0o600)
+        self.server.listen(16)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+    
+    def _run(self):
+        while True:
+            conn, _ = self.server.accept()
+            try:
+                conn.settimeout(self.HELLO_TIMEOUT)
+                with conn.makefile('rb') as f:
+                    hello = json.loads(f.readline())
+                conn.settimeout(None)
+                sess = sessions.get(hello.get('session'))
+                path = hello.get('path')
+            except (OSError, ValueError, AttributeError):
+                conn.close()
+                continue
+            if sess is None or not path:
+                conn.close()  # Helfer endet mit Fehler, beets verwirft die Bearbeitung
+                continue
+            with self.lock:
+                old = self.waiting.pop(path, None)
+                self.waiting[path] = conn
+            if old is not None:
+                old.close()
+            sess.open_editor(path)
+    
+    def is_waiting(self, path):
+        """True, wenn ein Helfer auf genau diese Datei wartet (nur solche dürfen bearbeitet werden)"""
+        with self.lock:
+            return path in self.waiting
+    
+    def release(self, path):
+        """Lässt beets mit der (ggf. geänderten) Datei weiterlaufen; False wenn kein Helfer wartet"""
+        with self.lock:
+            conn = self.waiting.pop(path, None)
+        if conn is None:
+            return False
+        try:
+            conn.sendall(b'done\n')
+        except OSError:
+            pass
+        conn.close()
+        return True
+
+editor_channel = EditorChannel(EDITOR_SOCKET_PATH)
+
+class ImportQueue:
+    """Persistente Import-Warteschlange; ein Worker startet den nächsten Import, sobald Platz frei ist"""
+    ACTIVE = ('running', 'needs-input')
+    
+    def __init__(self, path, manager):
+        self.path = path
+        self.manager = manager
+        self.items = []
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self._load()
+        manager.listeners.append(lambda sess: self.wakeup.set())
+    
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.items = json.load(f)
+        except (OSError, ValueError):
+            self.items = []
+        # Nach einem Neustart gibt es die Sessions nicht mehr: Laufendes neu einreihen
+        for item in self.items:
+            item.setdefault('mode', 'interactive')
+            if item['status'] in self.ACTIVE:
+                item['status'] = 'queued'
+                item['session_id'] = None
+    
+    def _save(self):
+        """Atomar speichern; Aufruf nur mit gehaltenem Lock"""
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.items, f, indent=1)
+        os.replace(tmp, self.path)
+    
+    def add(self, folders, mode='interactive', status='queued'):
+        """Reiht Ordner ein (ohne Duplikate offener Einträge); status='held' wartet auf Freigabe"""
+        with self.lock:
+            pending = {i['folder'] for i in self.items if i['status'] in ('queued', 'held') + self.ACTIVE}
+            for folder in folders:
+                if folder in pending:
+                    continue
+                self.items.append({
+                    'id': uuid.uuid4().hex[:8],
+                    'folder': folder,
+                    'mode': mode,
+                    'status': status,
+                    'session_id': None,
+                    'added': time.time(),
+                    'finished': None,
+                    'exit_code': None
+                })
+                pending.add(folder)
+            self._save()
+        self.wakeup.set()
+    
+    def remove(self, item_id):
+        """Entfernt einen Eintrag; ein laufender Import läuft weiter"""
+        with self.lock:
+            self.items = [i for i in self.items if i['id'] != item_id]
+            self._save()
+    
+    def retry(self, item_id):
+        with self.lock:
+            for item in self.items:
+                if item['id'] == item_id and item['status'] in ('done', 'failed', 'needs-review'):
+                    item.update(status='queued', session_id=None, finished=None, exit_code=None)
+            self._save()
+        self.wakeup.set()
+    
+    def approve(self, item_id, mode='interactive'):
+        """Zurückgehaltenen Eintrag (Auto-Import mit Freigabe) zum Start freigeben"""
+        with self.lock:
+            for item in self.items:
+                if item['id'] == item_id and item['status'] == 'held':
+                    item.update(mode=mode, status='queued')
+            self._save()
+        self.wakeup.set()
+    
+    def folders(self):
+        """Alle Ordner, die in der Warteschlange stehen"""
+        with self.lock:
+            return {i['folder'] for i in self.items}
+    
+    def review(self, item_id):
+        """Übersprungenen Batch-Eintrag interaktiv erneut einreihen"""
+        with self.lock:
+            for item in self.items:
+                if item['id'] == item_id and item['status'] == 'needs-review':
+                    item.update(mode='interactive', status='queued', session_id=None,
+                                finished=None, exit_code=None, skipped=[])
+            self._save()
+        self.wakeup.set()
+    
+    def clear_finished(self):
+        with self.lock:
+            self.items = [i for i in self.items if i['status'] not in ('done', 'failed')]
+            self._save()
+    
+    def snapshot(self):
+        with self.lock:
+            return [dict(i) for i in self.items]
+    
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+    
+    def _run(self):
+        while True:
+            self.wakeup.wait(timeout=2)
+            self.wakeup.clear()
+            try:
+                self._tick()
+            except Exception as e:
+                print(f"Error in import queue: {e}")
+    
+    def _tick(self):
+        """Status laufender Einträge aktualisieren und freie Slots füllen"""
+        with self.lock:
+            changed = False
+            for item in self.items:
+                if item['status'] not in self.ACTIVE:
+                    continue
+                sess = self.manager.get(item['session_id'])
+                # Erst mit exit_code ist der Import abgeschlossen: poll() meldet das Prozessende schon,
+                # bevor der PTY-Loop den restlichen Output gelesen und _finished aufgerufen hat
+                if sess is not None and sess.exit_code is None:
+                    status = 'needs-input' if sess.waiting_for_input() else 'running'
+                else:
+                    code = sess.exit_code if sess is not None else None
+                    status = 'done' if code == 0 else 'failed'
+                    if status == 'done' and item['mode'] == 'batch':
+                        # Unsichere Treffer hat beets übersprungen: zur späteren Prüfung parken
+                        item['skipped'] = sess.skipped_paths()
+                        if item['skipped']:
+                            status = 'needs-review'
+                    item['exit_code'] = code
+                    item['finished'] = time.time()
+                if status != item['status']:
+                    item['status'] = status
+                    changed = True
+            
+            for item in self.items:
+                if item['status'] != 'queued':
+                    continue
+                if len(self.manager.running()) >= self.manager.max_sessions:
+                    break
+                if not folder_index.is_stable(item['folder']):
+                    if not os.path.isdir(os.path.join(INPUT_DIR, item['folder'])):
+                        item['status'] = 'failed'
+                        item['finished'] = time.time()
+                        changed = True
+                    continue  # wird noch geschrieben
+                sess = self.manager.start(item['folder'], item['mode'])
+                if sess is None:
+                    continue  # Ordner läuft bereits manuell
+                item['status'] = 'running'
+                item['session_id'] = sess.id
+                changed = True
+            
+            if changed:
+                self._save()
+
+import_queue = ImportQueue(QUEUE_PATH, sessions)
+
+class Prefetcher:
+    """Sucht Kandidaten für den nächsten Ordner vorab, während eine Session auf Eingabe wartet"""
+    INTERVAL = 2
+    
+    def __init__(self, manager, queue):
+        self.manager = manager
+        self.queue = queue
+        self.done = set()  # vorab gesuchte Ordner, nur solange sie noch im Eingangsordner liegen
+        self.thread = None
+    
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+    
+    def _run(self):
+        while True:
+            time.sleep(self.INTERVAL)
+            try:
+                # Importierte/entfernte Ordner vergessen, sonst wächst die Menge unbegrenzt
+                self.done &= folder_index.snapshot().keys()
+                waiting = [s for s in self.manager.running() if s.mode == 'interactive' and s.waiting_for_input()]
+                if waiting:
+                    folder = self.next_folder(waiting[0].folder)
+                    if folder:
+                        self._lookup(folder)
+            except Exception as e:
+                print(f"Error in prefetch: {e}")
+    
+    def next_folder(self, current):
+        """Nächster interaktiver Queue-Eintrag, sonst der Ordner nach `current` in find_import_folders()"""
+        busy = {s.folder for s in self.manager.running()} | self.done
+        for item in self.queue.snapshot():
+            if (item['status'] == 'queued' and item['mode'] == 'interactive' and item['folder'] not in busy
+                    and folder_index.is_stable(item['folder'])):
+                return item['folder']
+        folders = find_import_folders()
+        start = folders.index(current) + 1 if current in folders else 0
+        for folder in folders[start:]:
+            if folder not in busy and folder_index.is_stable(folder):
+                return folder
+        return None
+    
+    def _lookup(self, folder):
+        env = os.environ.copy()
+        env["BEETSDIR"] = CONFIG_DIR
+        plugin_env(env)
+        try:
+            subprocess.run(
+                ["beet", "-c", ensure_beets_overlay(), "webimport-lookup", os.path.join(INPUT_DIR, folder)],
+                env=env,
+                capture_output=True,
+                timeout=300,
+                preexec_fn=lambda: os.nice(10)
+            )
+            self.done.add(folder)
+        except Exception as e:
+            print(f"Error prefetching {folder}: {e}")
 
-# Globale Session
-session = BeetsSession()
+prefetcher = Prefetcher(sessions, import_queue)
 
 # --- Beets Library Functions ---
+# Gelesen wird direkt und schreibgeschützt aus library.db, geschrieben nur über `beet`
+
+class ReadOnlyPool:
+    """Kleiner Pool schreibgeschützter SQLite-Verbindungen auf library.db"""
+    def __init__(self, path, size=READ_POOL_SIZE):
+        self.path = path
+        self.size = size
+        self.idle = []
+        self.lock = threading.Lock()
+    
+    def _connect(self):
+        conn = sqlite3.connect(f"file:{quote(self.path)}?mode=ro", uri=True, timeout=5,
+                               isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    @contextmanager
+    def snapshot(self):
+        """Eine Lese-Transaktion pro Anfrage: alle Abfragen darin sehen denselben Stand"""
+        with self.lock:
+            conn = self.idle.pop() if self.idle else None
+        if conn is None:
+            conn = self._connect()
+        healthy = False
+        try:
+            conn.execute('BEGIN')
+            yield conn
+            healthy = True
+        finally:
+            try:
+                conn.execute('ROLLBACK')
+            except sqlite3.Error:
+                healthy = False
+            with self.lock:
+                if healthy and len(self.idle) < self.size:
+                    self.idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+library_db = ReadOnlyPool(LIBRARY_DB)
+
+def enable_library_wal():
+    """Stellt library.db einmalig auf WAL um, damit Leser den Schreiber nie aufhalten"""
+    if os.environ.get("WEBIMPORT_LIBRARY_WAL", "1") == "0" or not os.path.exists(LIBRARY_DB):
+        return
+    try:
+        with db_write_lock():
+            conn = sqlite3.connect(LIBRARY_DB, timeout=30)
+            try:
+                mode = conn.execute('PRAGMA journal_mode=WAL').fetchone()[0]
+            finally:
+                conn.close()
+        if mode != 'wal':
+            print(f"library.db bleibt im Journal-Modus {mode}")
+    except sqlite3.Error as e:
+        print(f"Error enabling WAL: {e}")
+
+# (mtime der config.yaml, Musikverzeichnis als bytes)
+_library_directory = (None, None)
+
+def library_directory():
+    """Musikverzeichnis (bytes) aus der config.yaml (beets speichert Pfade darunter relativ).
+    
+    Die config.yaml wird nur neu geparst, wenn sich ihre mtime geändert hat.
+    """
+    global _library_directory
+    try:
+        mtime = os.stat(os.path.join(CONFIG_DIR, "config.yaml")).st_mtime_ns
+    except OSError:
+        mtime = None
+    cached_mtime, directory = _library_directory
+    if directory is None or mtime != cached_mtime:
+        directory = os.fsencode(os.path.expanduser(load_user_config().get('directory') or '~/Music'))
+        _library_directory = (mtime, directory)
+    return directory
+
+def item_path(raw, directory=None):
+    """Absoluter Pfad (bytes) eines Items aus der items-Tabelle; `directory` einmal je Abfrage übergeben"""
+    raw = raw if isinstance(raw, bytes) else os.fsencode(raw or '')
+    return raw if os.path.isabs(raw) else os.path.join(directory or library_directory(), raw)
+
+def query_albums(conn, where='', params=()):
+    """Alben als dict (feste Spalten und flexible Attribute wie Album.get)"""
+    albums = {row['id']: dict(row) for row in conn.execute(f"SELECT * FROM albums {where}", params)}
+    if albums:
+        flex = "SELECT entity_id, key, value FROM album_attributes"
+        if where:
+            flex += f" WHERE entity_id IN ({','.join('?' * len(albums))})"
+        for entity_id, key, value in conn.execute(flex, tuple(albums) if where else ()):
+            if entity_id in albums:
+                albums[entity_id].setdefault(key, value)
+    for album in albums.values():
+        # beets < 2.14: genre, danach mehrwertig als genres
+        genre = album.get('genre') or album.get('genres') or ''
+        album['genre'] = genre.replace('\\␀', ', ')
+    return albums
+
 def get_library_stats():
     """Holt Statistiken aus der Bibliothek"""
     try:
@@ -186,34 +1545,32 @@ def get_library_stats():
     except Exception as e:
         return f"Fehler: {e}"
 
-def get_library_items():
+def format_length(seconds):
+    """Formatiert eine Dauer wie beets' $length (M:SS)"""
+    if not seconds:
+        return ''
+    m, s = divmod(int(round(seconds)), 60)
+    return f"{m}:{s:02d}"
+
+def format_bitrate(bitrate):
+    """Formatiert eine Bitrate wie beets' $bitrate (kbps)"""
+    if not bitrate:
+        return ''
+    return f"{int(bitrate) // 1000}kbps"
+
+def get_library_items(conn):
     """Holt Items aus der Beets-Bibliothek und gruppiert nach Artist"""
     try:
-        env = os.environ.copy()
-        env["BEETSDIR"] = CONFIG_DIR
-        result = subprocess.run(
-            ["beet", "ls", "-a", "-f", "$id||$albumartist||$album||$year||$genre||$path"],
-            capture_output=True,
-            text=True,
-            env=env,
-            timeout=10
-        )
-        
         artists = defaultdict(list)
-        for line in result.stdout.strip().split('\n'):
-            if '||' in line:
-                parts = line.split('||')
-                if len(parts) >= 5:
-                    artist = parts[1] or "Unknown Artist"
-                    album_info = {
-                        'id': parts[0],
-                        'artist': parts[1],
-                        'album': parts[2],
-                        'year': parts[3],
-                        'genre': parts[4] if len(parts) > 4 else '',
-                        'path': parts[5] if len(parts) > 5 else ''
-                    }
-                    artists[artist].append(album_info)
+        for album in query_albums(conn).values():
+            artist = album['albumartist'] or "Unknown Artist"
+            artists[artist].append({
+                'id': str(album['id']),
+                'artist': album['albumartist'],
+                'album': album['album'],
+                'year': str(album['year']) if album['year'] else '',
+                'genre': album['genre']
+            })
         
         # Sortiere Artists alphabetisch und Alben nach Jahr
         sorted_artists = {}
@@ -225,76 +1582,309 @@ def get_library_items():
         print(f"Error getting library items: {e}")
         return {}
 
+def library_db_signature():
+    """mtime und Größe von library.db und WAL; ändert sich bei jedem Schreibzugriff, auch von außerhalb"""
+    sig = []
+    for suffix in ('', '-wal'):
+        try:
+            st = os.stat(LIBRARY_DB + suffix)
+            sig.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            sig.append(None)
+    return tuple(sig)
+
+class AlbumDetailsCache:
+    """LRU für Album-Details nach Album-ID, gültig für einen Stand von library.db.
+    
+    Jede Invalidierung erhöht die Generation; put() mit der Generation von vor dem Lesen
+    verwirft so Ergebnisse, die eine zwischenzeitliche Änderung überholt hat.
+    """
+    def __init__(self, size=ALBUM_DETAILS_CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.signature = None
+        self.generation = 0
+    
+    def begin(self):
+        """Vor dem Lesen aufrufen: leert den Cache, wenn library.db sich geändert hat; gibt die Generation zurück"""
+        sig = library_db_signature()
+        with self.lock:
+            if sig != self.signature:
+                self.entries.clear()
+                self.signature = sig
+                self.generation += 1
+            return self.generation
+    
+    def get(self, album_id):
+        with self.lock:
+            details = self.entries.get(album_id)
+            if details is not None:
+                self.entries.move_to_end(album_id)
+            return details
+    
+    def put(self, album_id, details, generation):
+        with self.lock:
+            if generation != self.generation:
+                return  # während des Lesens invalidiert
+            self.entries[album_id] = details
+            self.entries.move_to_end(album_id)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+    
+    def invalidate(self, album_id=None):
+        """Verwirft ein Album (nach Bearbeiten/Löschen) oder alles"""
+        with self.lock:
+            self.generation += 1
+            if album_id is None:
+                self.entries.clear()
+            elif str(album_id).isdigit():
+                self.entries.pop(int(album_id), None)
+
+album_details_cache = AlbumDetailsCache()
+
+# Album und alle Tracks in einer Abfrage; Alben ohne Items liefern eine Zeile mit NULL-Tracks
+ALBUM_DETAILS_QUERY = """
+    SELECT albums.*, items.path AS item_path, items.title AS item_title, items.track AS item_track,
+           items.length AS item_length, items.bitrate AS item_bitrate
+    FROM albums LEFT JOIN items ON items.album_id = albums.id
+    WHERE albums.id IN ({ids})
+    ORDER BY albums.id, items.disc, items.track
+"""
+
+def _album_details(rows, directory):
+    """Baut die Details eines Albums aus seinen Zeilen der Join-Abfrage"""
+    album = rows[0]
+    columns = album.keys()
+    tracks = [row for row in rows if row['item_path'] is not None]
+    paths = [item_path(row['item_path'], directory) for row in tracks]
+    genre = (album['genre'] if 'genre' in columns else album['genres'] if 'genres' in columns else '') or ''
+    details = {
+        'id': str(album['id']),
+        'albumartist': album['albumartist'],
+        'album': album['album'],
+        'year': str(album['year']) if album['year'] else '',
+        'genre': genre.replace('\\␀', ', '),
+        'label': album['label'] or '',
+        'catalognum': album['catalognum'] or '',
+        'country': album['country'] or '',
+        'albumtype': album['albumtype'] or '',
+        'mb_albumid': album['mb_albumid'] or '',
+        'path': displayable_path(os.path.dirname(paths[0])) if paths else '',
+        'cover': bool(album['artpath']),
+        'tracks': [],
+    }
+    total_length = total_size = 0
+    for row, path in zip(tracks, paths):
+        track = {
+            'track': str(row['item_track']) if row['item_track'] else '',
+            'title': row['item_title'] or '',
+            'length': format_length(row['item_length']),
+            'bitrate': format_bitrate(row['item_bitrate']),
+            'chapters': []
+        }
+        total_length += row['item_length'] or 0
+        try:
+            total_size += os.path.getsize(path)
+        except OSError:
+            pass
+        # Kapitel und Cover direkt aus den M4B-Dateien (nur moov wird gelesen)
+        if path.lower().endswith((b'.m4b', b'.m4a')):
+            try:
+                mp4 = read_mp4(path)
+                track['chapters'] = [{'start': format_length(c['start']) or '0:00', 'title': c['title']}
+                                     for c in mp4['chapters']]
+                details['cover'] = details['cover'] or bool(mp4['cover'])
+            except (Mp4Error, OSError, ValueError, struct.error):
+                pass
+        details['tracks'].append(track)
+    details['total_length'] = hours_filter(total_length) if total_length else ''
+    details['total_size'] = filesize_filter(total_size) if total_size else ''
+    return details
+
+def load_album_details(album_ids):
+    """Details mehrerer Alben: fehlende aus einer Join-Abfrage laden und cachen"""
+    result, missing = {}, []
+    generation = album_details_cache.begin()
+    for album_id in album_ids:
+        cached = album_details_cache.get(album_id)
+        if cached is not None:
+            result[album_id] = cached
+        else:
+            missing.append(album_id)
+    if missing:
+        with library_db.snapshot() as conn:
+            rows = conn.execute(ALBUM_DETAILS_QUERY.format(ids=','.join('?' * len(missing))),
+                                missing).fetchall()
+        grouped = defaultdict(list)
+        for row in rows:
+            grouped[row['id']].append(row)
+        directory = library_directory()
+        for album_id, album_rows in grouped.items():
+            result[album_id] = _album_details(album_rows, directory)
+            album_details_cache.put(album_id, result[album_id], generation)
+    return result
+
 def get_album_details(album_id):
     """Holt detaillierte Informationen über ein Album"""
     try:
-        env = os.environ.copy()
-        env["BEETSDIR"] = CONFIG_DIR
-        result = subprocess.run(
-            ["beet", "ls", "-a", f"id:{album_id}", "-f", 
-             "$id||$albumartist||$album||$year||$genre||$label||$catalognum||$country||$albumtype||$mb_albumid||$path"],
-            capture_output=True,
-            text=True,
-            env=env,
-            timeout=10
-        )
+        album_id = int(album_id)
+        return load_album_details([album_id]).get(album_id)
+    except Exception as e:
+        print(f"Error getting album details: {e}")
+        return None
+
+def normalize_key(text):
+    """Vergleichsschlüssel: ohne Akzente, Klammerzusätze (Ungekürzt, [ASIN]) und Satzzeichen"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c)).casefold()
+    text = re.sub(r'[(\[].*?[)\]]', ' ', text)
+    return ' '.join(re.findall(r'\w+', text))
+
+ASIN_PATTERN = re.compile(r'\b(B0[0-9A-Z]{8})\b')
+
+class DuplicateIndex:
+    """Bibliotheks-Index zum Erkennen bereits importierter Bücher"""
+    # Abweichung der Gesamtdauer in Sekunden, die noch als dasselbe Buch gilt
+    LENGTH_TOLERANCE = 2
+    
+    def __init__(self, albums=()):
+        self.ids = {}
+        self.names = {}
+        self.lengths = {}
+        for album in albums:
+            for key in (album['asin'], album['mb_albumid']):
+                if key:
+                    self.ids[key.upper()] = album
+            name = (normalize_key(album['albumartist']), normalize_key(album['album']))
+            if all(name):
+                self.names[name] = album
+            if album['tracks'] and album['length']:
+                self.lengths.setdefault((album['tracks'], round(album['length'])), []).append(album)
+    
+    def match(self, folder, scan=None):
+        """Sucht ein passendes Album; gibt (Album, Grund) oder None zurück"""
+        scan = scan or {}
+        asins = ASIN_PATTERN.findall(folder) + ([scan['asin']] if scan.get('asin') else [])
+        for asin in asins:
+            if asin.upper() in self.ids:
+                return self.ids[asin.upper()], 'ASIN'
         
-        if result.stdout.strip():
-            parts = result.stdout.strip().split('||')
-            details = {
-                'id': parts[0] if len(parts) > 0 else '',
-                'albumartist': parts[1] if len(parts) > 1 else '',
-                'album': parts[2] if len(parts) > 2 else '',
-                'year': parts[3] if len(parts) > 3 else '',
-                'genre': parts[4] if len(parts) > 4 else '',
-                'label': parts[5] if len(parts) > 5 else '',
-                'catalognum': parts[6] if len(parts) > 6 else '',
-                'country': parts[7] if len(parts) > 7 else '',
-                'albumtype': parts[8] if len(parts) > 8 else '',
-                'mb_albumid': parts[9] if len(parts) > 9 else '',
-                'path': parts[10] if len(parts) > 10 else ''
-            }
-            
-            # Hole Tracks
-            track_result = subprocess.run(
-                ["beet", "ls", f"album_id:{album_id}", "-f", "$track||$title||$length||$bitrate"],
-                capture_output=True,
-                text=True,
-                env=env,
-                timeout=10
-            )
-            
-            tracks = []
-            for line in track_result.stdout.strip().split('\n'):
-                if '||' in line:
-                    track_parts = line.split('||')
-                    if len(track_parts) >= 2:
-                        tracks.append({
-                            'track': track_parts[0],
-                            'title': track_parts[1],
-                            'length': track_parts[2] if len(track_parts) > 2 else '',
-                            'bitrate': track_parts[3] if len(track_parts) > 3 else ''
-                        })
-            
-            details['tracks'] = tracks
-            return details
+        # Autor/Titel aus den Tags, sonst aus dem Pfad (Autor/Titel oder "Autor - Titel")
+        parts = folder.split(os.sep)
+        if len(parts) >= 2:
+            guess = (parts[-2], parts[-1])
+        else:
+            guess = tuple(parts[-1].split(' - ', 1)) if ' - ' in parts[-1] else ('', parts[-1])
+        names = [(normalize_key(author), normalize_key(title))
+                 for author, title in ((scan.get('author'), scan.get('title')), guess)]
+        for name in names:
+            if all(name) and name in self.names:
+                return self.names[name], 'Autor + Titel'
+        
+        # Gleiche Dauer allein ist bei Einzeldatei-Büchern zu häufig; sie bestätigt nur
+        # einen Treffer, bei dem wenigstens Autor oder Titel übereinstimmt
+        if scan.get('files') and scan.get('duration'):
+            authors = {author for author, _ in names if author}
+            titles = {title for _, title in names if title}
+            length = round(scan['duration'])
+            for delta in range(-self.LENGTH_TOLERANCE, self.LENGTH_TOLERANCE + 1):
+                for album in self.lengths.get((scan['files'], length + delta), ()):
+                    if (normalize_key(album['albumartist']) in authors
+                            or normalize_key(album['album']) in titles):
+                        return album, 'Autor oder Titel + Gesamtdauer'
         return None
+
+def get_duplicate_index(conn):
+    """Baut den Duplikat-Index aus allen Alben (Dauer und Trackzahl aus einer Item-Abfrage)"""
+    try:
+        tracks = {row[0]: (row[1], row[2] or 0) for row in conn.execute(
+            "SELECT album_id, COUNT(*), SUM(length) FROM items GROUP BY album_id")}
+        return DuplicateIndex({
+            'id': str(album['id']),
+            'albumartist': album['albumartist'],
+            'album': album['album'],
+            'asin': album.get('asin') or '',
+            'mb_albumid': album.get('mb_albumid') or '',
+            'tracks': tracks.get(album['id'], (0, 0))[0],
+            'length': tracks.get(album['id'], (0, 0))[1],
+        } for album in query_albums(conn).values())
     except Exception as e:
-        print(f"Error getting album details: {e}")
+        print(f"Error building duplicate index: {e}")
         return None
 
+class LibrarySnapshot:
+    """Cache für die gruppierte Bibliothek, wird bei Änderungen an library.db neu gebaut"""
+    def __init__(self):
+        self.data = None
+        self.duplicates = DuplicateIndex()
+        self.signature = None
+        self.dirty = True
+        self.rebuilding = False
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+    
+    def invalidate(self):
+        """Markiert den Snapshot als veraltet (nach eigenen Schreibzugriffen)"""
+        with self.lock:
+            self.dirty = True
+    
+    def get(self):
+        """Liefert den Snapshot; ein veralteter wird ausgeliefert, während im Hintergrund neu gebaut wird"""
+        sig = library_db_signature()
+        with self.lock:
+            if (self.dirty or sig != self.signature) and not self.rebuilding:
+                self.rebuilding = True
+                self.dirty = False
+                threading.Thread(target=self._rebuild, args=(sig,), daemon=True).start()
+            data = self.data
+        if data is None:
+            # Nur beim allerersten Aufruf muss gewartet werden
+            self.ready.wait(timeout=30)
+            data = self.data or {}
+        return data
+    
+    def find_duplicate(self, folder, scan=None):
+        """Album, das zum Import-Ordner passt, als (Album, Grund) oder None"""
+        self.get()
+        return self.duplicates.match(folder, scan)
+    
+    def _rebuild(self, sig):
+        data = duplicates = None
+        try:
+            # Liste und Duplikat-Index aus demselben Datenbankstand
+            with library_db.snapshot() as conn:
+                data = get_library_items(conn)
+                duplicates = get_duplicate_index(conn)
+        except sqlite3.Error as e:
+            print(f"Error reading library: {e}")
+        finally:
+            with self.lock:
+                if duplicates is not None:
+                    self.duplicates = duplicates
+                if data is not None:
+                    self.data = data
+                    self.signature = sig
+                self.rebuilding = False
+            self.ready.set()
+
+library_cache = LibrarySnapshot()
+
 def delete_library_item(item_id):
     """Löscht ein Item aus der Bibliothek"""
     try:
         env = os.environ.copy()
         env["BEETSDIR"] = CONFIG_DIR
-        subprocess.run(
-            ["beet", "rm", "-a", f"id:{item_id}"],
-            env=env,
-            timeout=10,
-            input="y\n",
-            text=True
-        )
+        with db_write_lock():
+            subprocess.run(
+                ["beet", "rm", "-a", f"id:{item_id}"],
+                env=env,
+                timeout=10,
+                input="y\n",
+                text=True
+            )
+        library_cache.invalidate()
+        album_details_cache.invalidate(item_id)
         return True
     except Exception as e:
         print(f"Error deleting item: {e}")
@@ -305,13 +1895,16 @@ def update_library():
     try:
         env = os.environ.copy()
         env["BEETSDIR"] = CONFIG_DIR
-        result = subprocess.run(
-            ["beet", "update"],
-            capture_output=True,
-            text=True,
-            env=env,
-            timeout=30
-        )
+        with db_write_lock():
+            result = subprocess.run(
+                ["beet", "update"],
+                capture_output=True,
+                text=True,
+                env=env,
+                timeout=30
+            )
+        library_cache.invalidate()
+        album_details_cache.invalidate()
         return result.stdout
     except Exception as e:
         return f"Fehler: {e}"
@@ -321,13 +1914,16 @@ def move_library():
     try:
         env = os.environ.copy()
         env["BEETSDIR"] = CONFIG_DIR
-        result = subprocess.run(
-            ["beet", "move"],
-            capture_output=True,
-            text=True,
-            env=env,
-            timeout=60
-        )
+        with db_write_lock():
+            result = subprocess.run(
+                ["beet", "move"],
+                capture_output=True,
+                text=True,
+                env=env,
+                timeout=60
+            )
+        library_cache.invalidate()
+        album_details_cache.invalidate()
         return result.stdout
     except Exception as e:
         return f"Fehler: {e}"
@@ -437,6 +2033,11 @@ TEMPLATE = """
         .ansi-magenta { color: #bc3fbc; }
         .ansi-cyan { color: #11a8cd; }
         .ansi-white { color: #e5e5e5; }
+        .term-line { min-height: 1.4em; }
+        .ansi-bold { font-weight: bold; }
+        .ansi-dim { opacity: 0.7; }
+        .ansi-italic { font-style: italic; }
+        .ansi-underline { text-decoration: underline; }
 
         /* Number buttons - NEU */
         .number-buttons {
@@ -548,6 +2149,18 @@ TEMPLATE = """
             gap: 12px;
         }
         .folder-item:hover { background: #333; }
+        .folder-item label {
+            display: flex;
+            align-items: center;
+            gap: 8px;
+            min-width: 0;
+        }
+        .queue-status { flex-shrink: 0; }
+        .settling { color: #ff9800; }
+        .duplicate { color: #e57373; }
+        .queue-status.needs-input, .queue-status.needs-review, .queue-status.held { color: #ff9800; }
+        .queue-status.done { color: #4caf50; }
+        .queue-status.failed { color: #d32f2f; }
         .folder-item span { 
             overflow: hidden;
             text-overflow: ellipsis;
@@ -567,6 +2180,9 @@ TEMPLATE = """
             border-radius: var(--radius);
             margin-bottom: 12px;
             overflow: hidden;
+            /* Browser überspringt Layout/Paint für Gruppen außerhalb des Viewports */
+            content-visibility: auto;
+            contain-intrinsic-size: auto 52px;
         }
         
         .artist-header {
@@ -605,6 +2221,22 @@ TEMPLATE = """
             display: block;
         }
         
+        .library-sort {
+            background: #0c0c0c;
+            color: #e0e0e0;
+            border: 1px solid #444;
+            border-radius: var(--radius);
+            padding: 6px 8px;
+            font-size: 12px;
+        }
+        
+        .list-sentinel {
+            padding: 12px;
+            text-align: center;
+            color: #888;
+            font-size: 12px;
+        }
+        
         .album-item {
             background: #252525;
             border: 1px solid #333;
@@ -737,6 +2369,11 @@ TEMPLATE = """
             flex: 1;
         }
         
+        .chapter-list { margin-top: 6px; color: #aaa; font-size: 12px; }
+        .chapter-list summary { cursor: pointer; }
+        .chapter-start { display: inline-block; min-width: 60px; color: #888; }
+        .album-cover { grid-column: 1 / -1; max-width: 200px; border-radius: var(--radius); }
+        
         .track-number {
             display: inline-block;
             min-width: 30px;
@@ -788,8 +2425,9 @@ TEMPLATE = """
         {% if is_running %}
         <div class="controls">
             <span class="status">Import läuft: {{ current_folder }}</span>
+            <a href="{{ url_for('index') }}" class="btn btn-primary">☰ Übersicht</a>
             <button onclick="location.reload()" class="btn btn-primary">↻ Refresh</button>
-            <a href="{{ url_for('abort') }}" class="btn btn-danger">✕ Abbrechen</a>
+            <a href="{{ url_for('session_abort', session_id=session_id) }}" class="btn btn-danger">✕ Abbrechen</a>
         </div>
         {% endif %}
     </div>
@@ -797,14 +2435,106 @@ TEMPLATE = """
     <div class="main-content">
         {% if not is_running %}
         <div class="folder-selection">
+            {% if import_sessions %}
+            <div class="section-header">
+                <h2>Imports ({{ running_count }}/{{ max_sessions }} aktiv):</h2>
+            </div>
+            <ul class="folder-list" style="margin-bottom: 24px;">
+                {% for s in import_sessions %}
+                <li class="folder-item">
+                    <span>{{ '▶️' if s.is_running() else '✔️' }} {{ s.folder }}</span>
+                    <a href="{{ url_for('session_view', session_id=s.id) }}" class="btn btn-primary">Terminal</a>
+                </li>
+                {% endfor %}
+            </ul>
+            {% endif %}
+            {% if queue_items %}
+            <div class="section-header">
+                <h2>Warteschlange:</h2>
+                <div class="controls">
+                    <a href="{{ url_for('queue_clear') }}" class="btn btn-primary btn-small">Erledigte entfernen</a>
+                </div>
+            </div>
+            <ul class="folder-list" id="queueList" style="margin-bottom: 24px;">
+                {% for item in queue_items %}
+                <li class="folder-item">
+                    <span>{{ '⚡ ' if item.mode == 'batch' }}{{ item.folder }}{% if item.status == 'queued' and item.folder in folder_info and not folder_info[item.folder].stable %} <span class="settling" title="wartet, bis auto-m4b fertig geschrieben hat">⏳</span>{% endif %}</span>
+                    <span class="status queue-status {{ item.status }}" id="q-{{ item.id }}" data-status="{{ item.status }}">{{ queue_labels[item.status] }}</span>
+                    <div class="album-actions">
+                        {% if item.session_id and item.status in ('running', 'needs-input') %}
+                        <a href="{{ url_for('session_view', session_id=item.session_id) }}" class="btn btn-primary btn-small">Terminal</a>
+                        {% endif %}
+                        {% if item.status == 'held' %}
+                        <a href="{{ url_for('queue_approve', item_id=item.id) }}" class="btn btn-success btn-small">Freigeben</a>
+                        <a href="{{ url_for('queue_approve', item_id=item.id, mode='batch') }}" class="btn btn-info btn-small">⚡</a>
+                        {% endif %}
+                        {% if item.status == 'needs-review' %}
+                        <a href="{{ url_for('queue_review', item_id=item.id) }}" class="btn btn-warning btn-small">Prüfen</a>
+                        {% endif %}
+                        {% if item.status in ('done', 'failed') %}
+                        <a href="{{ url_for('queue_retry', item_id=item.id) }}" class="btn btn-warning btn-small">↻</a>
+                        {% endif %}
+                        <a href="{{ url_for('queue_remove', item_id=item.id) }}" class="btn btn-danger btn-small">✕</a>
+                    </div>
+                </li>
+                {% endfor %}
+            </ul>
+            {% endif %}
+            <form id="queueForm" method="post" action="{{ url_for('queue_add') }}"></form>
+            <form method="post" action="{{ url_for('settings_auto_import') }}" class="section-header" style="justify-content:flex-start;">
+                <label for="autoImport" class="status">Auto-Import neuer Ordner:</label>
+                <select id="autoImport" name="mode" class="library-sort" onchange="this.form.submit()">
+                    {% for value, label in auto_import_labels.items() %}
+                    <option value="{{ value }}" {{ 'selected' if value == auto_import }}>{{ label }}</option>
+                    {% endfor %}
+                </select>
+            </form>
             <div class="section-header">
                 <h2>Wähle ein Hörbuch zum Import:</h2>
+                <div class="controls">
+                    <button type="submit" form="queueForm" class="btn btn-primary btn-small">➕ Auswahl einreihen</button>
+                    <button type="submit" form="queueForm" name="mode" value="batch" class="btn btn-info btn-small">⚡ Auswahl als Batch</button>
+                    <button type="submit" form="queueForm" formaction="{{ url_for('queue_batch_all') }}" class="btn btn-info btn-small">⚡ Alle als Batch</button>
+                </div>
             </div>
             <ul class="folder-list">
                 {% for folder in folders %}
                 <li class="folder-item">
-                    <span>📁 {{ folder }}</span>
+                    {% set info = folder_info.get(folder) %}
+                    <label>
+                        <input type="checkbox" name="folders" value="{{ folder }}" form="queueForm">
+                        <div class="album-info">
+                            <div class="album-title">📁 {{ folder }}{% if folder in prefetched %} <span title="Kandidaten vorab gesucht">🔎</span>{% endif %}</div>
+                            {% if info %}
+                            <div class="album-meta">
+                                {{ info.files }} Datei(en) · {{ info.bytes|filesize }} · {{ info.mtime|datetime }}
+                                {% if not info.stable %} · <span class="settling" title="auto-m4b schreibt noch - wird erst danach automatisch importiert">⏳ schreibt noch</span>{% endif %}
+                            </div>
+                            {% endif %}
+                            {% set scan = prescan.get(folder) %}
+                            {% if scan %}
+                            <div class="album-meta">
+                                {% if scan.author %}👤 {{ scan.author }} · {% endif %}{% if scan.title %}📖 {{ scan.title }} · {% endif %}{% if scan.narrator %}🎙 {{ scan.narrator }} · {% endif %}
+                                ⏱ {{ scan.duration|hours }}{% if scan.bitrate %} · {{ (scan.bitrate // 1000)|int }} kbps{% endif %}
+                                · {{ scan.chapters }} Kapitel · {{ '🖼 Cover' if scan.cover else 'kein Cover' }}
+                                {% if scan.errors %} · <span class="settling">{{ scan.errors }} Datei(en) nicht lesbar</span>{% endif %}
+                            </div>
+                            {% endif %}
+                            {% if folder in duplicates %}
+                            {% set dup, reason = duplicates[folder] %}
+                            <div class="album-meta duplicate" title="Übereinstimmung: {{ reason }}">
+                                ⚠ wahrscheinlich schon importiert: {{ dup.albumartist }} – {{ dup.album }} ({{ reason }})
+                            </div>
+                            {% endif %}
+                        </div>
+                    </label>
+                    {% if folder in running_folders %}
+                    <span class="status">läuft</span>
+                    {% elif running_count >= max_sessions %}
+                    <span class="status">Limit erreicht</span>
+                    {% else %}
                     <a href="{{ url_for('start_import', folder=folder) }}" class="btn btn-success">Importieren</a>
+                    {% endif %}
                 </li>
                 {% else %}
                 <li class="folder-item">
@@ -816,45 +2546,23 @@ TEMPLATE = """
             <div class="library-section">
                 <div class="section-header">
                     <h2>Bibliothek ({{ total_albums }} Alben):</h2>
+                    <span class="status" title="Cache für Metadaten-Abfragen (beets-audible)">
+                        Metadaten-Cache: {{ http_cache.hits }} Treffer / {{ http_cache.misses }} Abrufe
+                        · {{ (http_cache.bytes / 1048576)|round(1) }} MB
+                    </span>
                     <div class="controls">
+                        <select id="librarySort" class="library-sort" onchange="resetLibrary()">
+                            <option value="name">A–Z</option>
+                            <option value="name_desc">Z–A</option>
+                            <option value="count">Meiste Alben</option>
+                        </select>
                         <a href="{{ url_for('library_stats') }}" class="btn btn-primary btn-small">📊 Stats</a>
+                        <a href="{{ url_for('history') }}" class="btn btn-primary btn-small">📜 Verlauf</a>
                     </div>
                 </div>
                 
-                {% for artist, albums in library_items.items() %}
-                <div class="artist-group">
-                    <div class="artist-header" onclick="toggleArtist(this)">
-                        <div class="artist-name">{{ artist }}</div>
-                        <div class="artist-count">{{ albums|length }} Album(en)</div>
-                    </div>
-                    <div class="albums-container">
-                        {% for album in albums %}
-                        <div class="album-item">
-                            <div class="album-info">
-                                <div class="album-title">{{ album.album }}</div>
-                                <div class="album-meta">
-                                    {{ album.year or '?' }}
-                                    {% if album.genre %} • {{ album.genre }}{% endif %}
-                                </div>
-                            </div>
-                            <div class="album-actions">
-                                <button onclick="showAlbumDetails('{{ album.id }}')" class="btn btn-info btn-small">ℹ️ Info</button>
-                                <button onclick="editAlbum('{{ album.id }}')" class="btn btn-warning btn-small">✏️ Edit</button>
-                                <a href="{{ url_for('delete_item', item_id=album.id) }}" 
-                                   onclick="return confirm('Album wirklich löschen?')"
-                                   class="btn btn-danger btn-small">✕</a>
-                            </div>
-                        </div>
-                        {% endfor %}
-                    </div>
-                </div>
-                {% else %}
-                <div class="artist-group">
-                    <div class="artist-header">
-                        <span style="color: #888;">Bibliothek ist leer</span>
-                    </div>
-                </div>
-                {% endfor %}
+                <div id="artistList"></div>
+                <div id="artistSentinel" class="list-sentinel">Lade Bibliothek...</div>
             </div>
         </div>
         {% else %}
@@ -885,7 +2593,7 @@ TEMPLATE = """
         </div>
         
         <div class="input-area">
-            <form method="post" action="{{ url_for('send_input') }}" class="input-form" id="input-form">
+            <form method="post" action="{{ url_for('session_send', session_id=session_id) }}" class="input-form" id="input-form">
                 <input type="text" id="input" name="text" placeholder="Eingabe..." autocomplete="off" autofocus>
                 <button type="submit" class="btn btn-primary">Senden</button>
             </form>
@@ -942,60 +2650,254 @@ TEMPLATE = """
             const terminal = document.getElementById('terminal');
             terminal.scrollTop = terminal.scrollHeight;
         }
+        const SESSION_BASE = '/session/{{ session_id }}';
+        let terminalCursor = {{ terminal_cursor }};
+        // Übernimmt geänderte Zeilen des Server-Terminals (Zeilennummern über Scrollback hinweg)
+        function applyScreen(data) {
+            const terminal = document.getElementById('terminal');
+            if (data.reset) terminal.innerHTML = '';
+            data.rows.forEach(([number, html]) => {
+                let line = document.getElementById('L' + number);
+                if (!line) {
+                    line = document.createElement('div');
+                    line.className = 'term-line';
+                    line.id = 'L' + number;
+                    terminal.appendChild(line);
+                }
+                line.innerHTML = html;
+            });
+            for (let n = data.top; n < data.top + {{ terminal_rows }}; n++) {
+                const line = document.getElementById('L' + n);
+                if (line) line.hidden = n >= data.end;
+            }
+            // Aus dem Server-Scrollback gefallene Zeilen auch hier verwerfen
+            while (terminal.firstElementChild && parseInt(terminal.firstElementChild.id.slice(1), 10) < data.first) {
+                terminal.firstElementChild.remove();
+            }
+            terminalCursor = data.seq;
+            if (data.rows.length) scrollTerminal();
+        }
         function updateTerminal() {
-            fetch('/terminal')
+            fetch(SESSION_BASE + '/terminal?since=' + terminalCursor)
                 .then(r => r.json())
                 .then(data => {
                     if (data.open_path) {
                         window.location.href = '/edit?path=' + encodeURIComponent(data.open_path);
                         return;
                     }
-                    const terminal = document.getElementById('terminal');
-                    if (data.output !== terminal.textContent) {
-                        terminal.innerHTML = data.output_html;
-                        scrollTerminal();
-                    }
+                    applyScreen(data);
                     if (!data.is_running) {
-                        setTimeout(() => location.href = '/', 2000);
+                        setTimeout(() => location.href = '/next', 2000);
                     }
                 });
         }
         function sendShortcut(key) {
-            fetch('/send', {
+            fetch(SESSION_BASE + '/send', {
                 method: 'POST',
                 headers: {'Content-Type': 'application/x-www-form-urlencoded'},
                 body: 'text=' + encodeURIComponent(key)
             }).then(() => {
-                setTimeout(updateTerminal, 100);
+                if (!streaming) setTimeout(updateTerminal, 100);
+            });
+        }
+        
+        // Live-Output per SSE, Polling nur als Fallback
+        let streaming = false;
+        function startPolling() {
+            streaming = false;
+            setInterval(updateTerminal, 500);
+        }
+        if (window.EventSource) {
+            streaming = true;
+            const es = new EventSource(SESSION_BASE + '/terminal/stream?since=' + terminalCursor);
+            es.addEventListener('screen', e => applyScreen(JSON.parse(e.data)));
+            es.addEventListener('editor', e => {
+                es.close();
+                window.location.href = '/edit?path=' + encodeURIComponent(JSON.parse(e.data).path);
             });
+            es.addEventListener('exit', () => {
+                es.close();
+                setTimeout(() => location.href = '/next', 2000);
+            });
+            es.onerror = () => {
+                // EventSource verbindet sich selbst neu; nur wenn es aufgibt, auf Polling wechseln
+                if (es.readyState === EventSource.CLOSED) startPolling();
+            };
+        } else {
+            startPolling();
         }
-        setInterval(updateTerminal, 500);
         scrollTerminal();
         document.getElementById('input').focus();
         document.getElementById('input-form').onsubmit = function(e) {
             e.preventDefault();
             const input = document.getElementById('input');
             const text = input.value;
-            fetch('/send', {
+            fetch(SESSION_BASE + '/send', {
                 method: 'POST',
                 headers: {'Content-Type': 'application/x-www-form-urlencoded'},
                 body: 'text=' + encodeURIComponent(text)
             }).then(() => {
                 input.value = '';
                 input.focus();
-                setTimeout(updateTerminal, 100);
+                if (!streaming) setTimeout(updateTerminal, 100);
             });
             return false;
         };
         {% else %}
+        // Status der Warteschlange aktualisieren, solange etwas offen ist
+        const QUEUE_LABELS = {{ queue_labels|tojson }};
+        function updateQueue() {
+            fetch('/api/queue')
+                .then(r => r.json())
+                .then(data => {
+                    let open = false;
+                    data.items.forEach(item => {
+                        const el = document.getElementById('q-' + item.id);
+                        if (!el) return;
+                        const prev = el.dataset.status;
+                        const finished = ['done', 'failed', 'needs-review'].includes(item.status);
+                        if (prev !== item.status && (prev === 'queued' || finished)) {
+                            // Import gestartet oder beendet: Links neu rendern lassen
+                            location.reload();
+                        }
+                        el.dataset.status = item.status;
+                        el.textContent = QUEUE_LABELS[item.status];
+                        el.className = 'status queue-status ' + item.status;
+                        if (!finished) open = true;
+                    });
+                    if (open) setTimeout(updateQueue, 3000);
+                });
+        }
+        if (document.getElementById('queueList')) updateQueue();
+        
+        const LIBRARY_PAGE = 100;
+        let libraryOffset = 0;
+        let libraryTotal = null;
+        let libraryLoading = false;
+        // Sortierwechsel startet eine neue Generation; Antworten älterer Generationen werden verworfen
+        let libraryGeneration = 0;
+        let libraryRequest = null;
+        
+        function esc(s) {
+            return String(s == null ? '' : s).replace(/[&<>"']/g, c => ({
+                '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+            }[c]));
+        }
+        
+        function renderArtist(artist) {
+            const group = document.createElement('div');
+            group.className = 'artist-group';
+            group.innerHTML =
+                '<div class="artist-header" onclick="toggleArtist(this)">' +
+                '<div class="artist-name">' + esc(artist.name) + '</div>' +
+                '<div class="artist-count">' + artist.count + ' Album(en)</div>' +
+                '</div><div class="albums-container"></div>';
+            group.firstChild.dataset.artist = artist.name;
+            return group;
+        }
+        
+        function renderAlbum(album) {
+            return '<div class="album-item">' +
+                '<div class="album-info">' +
+                '<div class="album-title">' + esc(album.album) + '</div>' +
+                '<div class="album-meta">' + esc(album.year || '?') +
+                (album.genre ? ' • ' + esc(album.genre) : '') + '</div>' +
+                '</div>' +
+                '<div class="album-actions">' +
+                '<button onclick="showAlbumDetails(\\'' + album.id + '\\')" class="btn btn-info btn-small">ℹ️ Info</button>' +
+                '<button onclick="editAlbum(\\'' + album.id + '\\')" class="btn btn-warning btn-small">✏️ Edit</button>' +
+                '<a href="/delete/' + album.id + '" onclick="return confirm(\\'Album wirklich löschen?\\')" class="btn btn-danger btn-small">✕</a>' +
+                '</div></div>';
+        }
+        
+        function loadLibraryPage() {
+            if (libraryLoading || (libraryTotal !== null && libraryOffset >= libraryTotal)) return;
+            libraryLoading = true;
+            const generation = libraryGeneration;
+            const sort = document.getElementById('librarySort').value;
+            libraryRequest = new AbortController();
+            fetch('/api/library?offset=' + libraryOffset + '&limit=' + LIBRARY_PAGE + '&sort=' + sort,
+                  {signal: libraryRequest.signal})
+                .then(r => r.json())
+                .then(data => {
+                    if (generation !== libraryGeneration) return;
+                    const list = document.getElementById('artistList');
+                    const frag = document.createDocumentFragment();
+                    data.artists.forEach(a => frag.appendChild(renderArtist(a)));
+                    list.appendChild(frag);
+                    libraryTotal = data.total;
+                    libraryOffset += data.artists.length;
+                    const sentinel = document.getElementById('artistSentinel');
+                    if (libraryTotal === 0) {
+                        sentinel.textContent = 'Bibliothek ist leer';
+                    } else if (libraryOffset >= libraryTotal) {
+                        sentinel.textContent = '';
+                    }
+                })
+                .catch(e => { if (e.name !== 'AbortError') console.error(e); })
+                .finally(() => {
+                    if (generation === libraryGeneration) libraryLoading = false;
+                });
+        }
+        
+        function resetLibrary() {
+            libraryGeneration++;
+            if (libraryRequest) libraryRequest.abort();
+            libraryLoading = false;
+            document.getElementById('artistList').innerHTML = '';
+            document.getElementById('artistSentinel').textContent = 'Lade Bibliothek...';
+            libraryOffset = 0;
+            libraryTotal = null;
+            loadLibraryPage();
+        }
+        
+        // Nächste Seite laden, sobald das Listenende in Sichtweite kommt
+        new IntersectionObserver(entries => {
+            if (entries.some(e => e.isIntersecting)) loadLibraryPage();
+        }, {rootMargin: '800px'}).observe(document.getElementById('artistSentinel'));
+        
         function toggleArtist(header) {
             const container = header.nextElementSibling;
             container.classList.toggle('show');
+            if (!container.dataset.loaded) {
+                container.dataset.loaded = '1';
+                fetch('/api/artist/' + encodeURIComponent(header.dataset.artist) + '/albums')
+                    .then(r => r.json())
+                    .then(data => {
+                        container.innerHTML = data.albums.map(renderAlbum).join('');
+                        prefetchAlbumDetails(data.albums.map(a => a.id));
+                    });
+            }
+        }
+        
+        // Album-Details als Promises je ID; beim Aufklappen eines Artists für alle Alben vorab geladen
+        const albumDetails = {};
+        const ALBUM_DETAILS_BATCH = {{ album_details_batch }};
+        
+        function prefetchAlbumDetails(ids) {
+            ids = ids.filter(id => !(id in albumDetails));
+            for (let i = 0; i < ids.length; i += ALBUM_DETAILS_BATCH) {
+                const chunk = ids.slice(i, i + ALBUM_DETAILS_BATCH);
+                const batch = fetch('/album_details?ids=' + chunk.join(','))
+                    .then(r => r.json())
+                    .then(data => data.albums);
+                chunk.forEach(id => {
+                    albumDetails[id] = batch.then(albums => albums[id] || fetchAlbumDetails(id, true));
+                    albumDetails[id].catch(() => { delete albumDetails[id]; });
+                });
+            }
+        }
+        
+        function fetchAlbumDetails(albumId, force) {
+            if (force || !(albumId in albumDetails)) {
+                albumDetails[albumId] = fetch('/album_details/' + albumId).then(r => r.json());
+                albumDetails[albumId].catch(() => { delete albumDetails[albumId]; });
+            }
+            return albumDetails[albumId];
         }
         
         function showAlbumDetails(albumId) {
-            fetch('/album_details/' + albumId)
-                .then(r => r.json())
+            fetchAlbumDetails(albumId)
                 .then(data => {
                     if (data) {
                         document.getElementById('modalTitle').textContent = data.album || 'Album Details';
@@ -1010,9 +2912,18 @@ TEMPLATE = """
                         html += '<div class="detail-label">Land:</div><div class="detail-value">' + (data.country || '-') + '</div>';
                         html += '<div class="detail-label">Typ:</div><div class="detail-value">' + (data.albumtype || '-') + '</div>';
                         html += '<div class="detail-label">MusicBrainz ID:</div><div class="detail-value">' + (data.mb_albumid || '-') + '</div>';
+                        if (data.total_length) {
+                            html += '<div class="detail-label">Gesamtdauer:</div><div class="detail-value">' + data.total_length + '</div>';
+                        }
+                        if (data.total_size) {
+                            html += '<div class="detail-label">Größe:</div><div class="detail-value">' + data.total_size + '</div>';
+                        }
                         html += '<div class="detail-label">Pfad:</div><div class="detail-value" style="font-size: 11px;">' + (data.path || '-') + '</div>';
                         html += '</div>';
                         
+                        if (data.cover) {
+                            html = '<img class="album-cover" src="/album_cover/' + data.id + '" alt="">' + html;
+                        }
                         document.getElementById('detailsContainer').innerHTML = html;
                         
                         let trackHtml = '<h3>Tracks:</h3>';
@@ -1022,6 +2933,13 @@ TEMPLATE = """
                                 trackHtml += '<div class="track-info">';
                                 trackHtml += '<span class="track-number">' + (track.track || '?') + '.</span> ';
                                 trackHtml += track.title || 'Unknown';
+                                if (track.chapters && track.chapters.length > 0) {
+                                    trackHtml += '<details class="chapter-list"><summary>' + track.chapters.length + ' Kapitel</summary>';
+                                    track.chapters.forEach(ch => {
+                                        trackHtml += '<div><span class="chapter-start">' + ch.start + '</span>' + esc(ch.title) + '</div>';
+                                    });
+                                    trackHtml += '</details>';
+                                }
                                 trackHtml += '</div>';
                                 if (track.length) {
                                     trackHtml += '<div style="color: #aaa; font-size: 12px;">' + track.length + '</div>';
@@ -1043,8 +2961,7 @@ TEMPLATE = """
         }
         
         function editAlbum(albumId) {
-            fetch('/album_details/' + albumId)
-                .then(r => r.json())
+            fetchAlbumDetails(albumId)
                 .then(data => {
                     if (data) {
                         document.getElementById('editAlbumId').value = albumId;
@@ -1133,88 +3050,1493 @@ EDIT_TEMPLATE = """
 </html>
 """
 
+HISTORY_TEMPLATE = """
+<!doctype html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>Import-Verlauf</title>
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <style>
+        :root{ --pad:16px; --gap:10px; --radius:8px; --font-mono:Menlo,Consolas,monospace; }
+        body { background:#0c0c0c; color:#e0e0e0; font-family:-apple-system,BlinkMacSystemFont,"Segoe UI",Roboto,sans-serif; margin:0; }
+        a { color:#4aa3df; }
+        .bar { display:flex; align-items:center; justify-content:space-between; gap: var(--gap); padding:12px var(--pad); background:#1f1f1f; border-bottom:1px solid #333; flex-wrap: wrap; }
+        .meta { font-size:12px; color:#aaa; word-break: break-all; }
+        .btn { padding:8px 12px; border:0; border-radius:var(--radius); cursor:pointer; font-size:14px; text-decoration:none; display:inline-block; }
+        .btn-primary { background:#007acc; color:#fff; }
+        .btn-secondary { background:#333; color:#ddd; }
+        .wrap { padding:var(--pad); }
+        input[type=search] { background:#0b0b0b; color:#e6e6e6; border:1px solid #333; border-radius:6px; padding:8px; min-width:240px; }
+        table { width:100%; border-collapse:collapse; font-size:14px; }
+        th, td { text-align:left; padding:6px 8px; border-bottom:1px solid #222; vertical-align:top; }
+        th { color:#aaa; font-weight:normal; }
+        .failed { color:#f14c4c; }
+        .pager { display:flex; gap: var(--gap); align-items:center; margin-top:12px; }
+        pre { background:#0b0b0b; border:1px solid #333; border-radius:6px; padding:12px; font-family: var(--font-mono); font-size:13px; line-height:1.4; white-space:pre-wrap; word-break:break-all; }
+        .ansi-black { color: #000; }
+        .ansi-red { color: #cd3131; }
+        .ansi-green { color: #0dbc79; }
+        .ansi-yellow { color: #e5e510; }
+        .ansi-blue { color: #2472c8; }
+        .ansi-magenta { color: #bc3fbc; }
+        .ansi-cyan { color: #11a8cd; }
+        .ansi-white { color: #e5e5e5; }
+        .ansi-bold { font-weight: bold; }
+        .ansi-dim { opacity: 0.7; }
+        .ansi-italic { font-style: italic; }
+        .ansi-underline { text-decoration: underline; }
+    </style>
+</head>
+<body>
+    {% macro choice_text(c) -%}
+        {%- if c.choice == 'apply' -%}{{ c.artist }} – {{ c.album }}{% if c.source %} ({{ c.source }}){% endif %}
+        {%- elif c.choice == 'asis' -%}wie vorhanden: {{ c.artist }} – {{ c.album }}
+        {%- elif c.choice == 'skip' -%}übersprungen
+        {%- else -%}{{ c.choice }}{%- endif -%}
+    {%- endmacro %}
+    {% if entry %}
+    <div class="bar">
+        <div>
+            <strong>{{ entry.folder }}</strong>
+            <div class="meta">
+                {{ entry.started|datetime }} – {{ entry.finished|datetime if entry.finished else 'läuft' }}
+                · {{ entry.mode }} · Exit {{ entry.exit_code if entry.exit_code is not none else '-' }}
+                · {{ entry.size|filesize }} komprimiert
+                {% for c in entry.choices %}<br>{{ choice_text(c) }}{% endfor %}
+            </div>
+        </div>
+        <div>
+            <a class="btn btn-secondary" href="{{ url_for('history') }}">Zurück</a>
+            <a class="btn btn-primary" href="{{ url_for('history_transcript_raw', entry_id=entry.id) }}">Als Text</a>
+        </div>
+    </div>
+    <div class="wrap">
+        <pre>{{ transcript|safe }}</pre>
+        <div class="pager">
+            {% if page > 0 %}<a class="btn btn-secondary" href="{{ url_for('history_entry', entry_id=entry.id, page=page - 1) }}">‹ Zurück</a>{% endif %}
+            <span class="meta">Seite {{ page + 1 }}</span>
+            {% if has_more %}<a class="btn btn-secondary" href="{{ url_for('history_entry', entry_id=entry.id, page=page + 1) }}">Weiter ›</a>{% endif %}
+        </div>
+    </div>
+    {% else %}
+    <div class="bar">
+        <strong>Import-Verlauf ({{ total }})</strong>
+        <form method="get" action="{{ url_for('history') }}">
+            <input type="search" name="q" value="{{ query }}" placeholder="Ordner oder Buch suchen">
+            <button type="submit" class="btn btn-primary">Suchen</button>
+            <a class="btn btn-secondary" href="{{ url_for('index') }}">Übersicht</a>
+        </form>
+    </div>
+    <div class="wrap">
+        <table>
+            <tr><th>Start</th><th>Ende</th><th>Ordner</th><th>Modus</th><th>Exit</th><th>Gewählt</th></tr>
+            {% for e in entries %}
+            <tr>
+                <td>{{ e.started|datetime }}</td>
+                <td>{{ e.finished|datetime if e.finished else 'läuft' }}</td>
+                <td><a href="{{ url_for('history_entry', entry_id=e.id) }}">{{ e.folder }}</a></td>
+                <td>{{ e.mode }}</td>
+                <td class="{{ 'failed' if e.exit_code else '' }}">{{ e.exit_code if e.exit_code is not none else '-' }}</td>
+                <td>{% for c in e.choices %}{{ choice_text(c) }}{% if not loop.last %}<br>{% endif %}{% endfor %}</td>
+            </tr>
+            {% else %}
+            <tr><td colspan="6" class="meta">Keine Imports gefunden.</td></tr>
+            {% endfor %}
+        </table>
+        <div class="pager">
+            {% if page > 0 %}<a class="btn btn-secondary" href="{{ url_for('history', q=query, page=page - 1) }}">‹ Neuere</a>{% endif %}
+            <span class="meta">Seite {{ page + 1 }} von {{ pages }}</span>
+            {% if page + 1 < pages %}<a class="btn btn-secondary" href="{{ url_for('history', q=query, page=page + 1) }}">Ältere ›</a>{% endif %}
+        </div>
+    </div>
+    {% endif %}
+</body>
+</html>
+"""
+
 # --- Helper Functions ---
 
-def ansi_to_html(text):
-    """Konvertiert ANSI codes zu HTML spans"""
-    ansi_colors = {
-        '30': 'black', '31': 'red', '32': 'green', '33': 'yellow',
-        '34': 'blue', '35': 'magenta', '36': 'cyan', '37': 'white'
-    }
-    import html
-    text = html.escape(text)
-    for code, color in ansi_colors.items():
-        text = text.replace(f'\x1b[{code}m', f'<span class="ansi-{color}">')
-        text = text.replace(f'\x1b[1;{code}m', f'<span class="ansi-{color}">')
-    text = text.replace('\x1b[0m', '</span>')
-    text = text.replace('\x1b[m', '</span>')
-    text = re.sub(r'\x1b\[[0-9;]*[mGKH]', '', text)
-    return text
+# Farben wie die .ansi-* Klassen im Template; 90-97/100-107 und 256 Farben als Inline-Style
+ANSI_NAMES = ['black', 'red', 'green', 'yellow', 'blue', 'magenta', 'cyan', 'white']
+ANSI_BRIGHT = ['#666666', '#f14c4c', '#23d18b', '#f5f543', '#3b8eea', '#d670d6', '#29b8db', '#ffffff']
+ANSI_BASIC = ['#000000', '#cd3131', '#0dbc79', '#e5e510', '#2472c8', '#bc3fbc', '#11a8cd', '#e5e5e5']
+TERMINAL_FG = '#00ff00'
+TERMINAL_BG = '#0c0c0c'
+# CSI (mit Parametern), OSC (bis BEL/ST), Zeichensatz-Wahl und sonstige 2-Byte-Escapes
+ANSI_SEQUENCE = re.compile(r'\x1b(?:\[([0-?]*)[ -/]*([@-~])|\][^\x07\x1b]*(?:\x07|\x1b\\)|[()*+][0-9A-Za-z]|[@-Z\\^_=>78c])')
+# Am Chunk-Ende abgeschnittene Sequenz, wird mit dem nächsten Chunk zusammengesetzt
+ANSI_PARTIAL = re.compile(r'\x1b(?:\[[0-?]*[ -/]*|\][^\x07\x1b]*\x1b?|[()*+])?\Z')
+# Steuerzeichen außer \n und \t (CR, BEL, Backspace, ...)
+ANSI_CONTROL = re.compile(r'[\x00-\x08\x0b-\x1f\x7f]')
+
+def ansi_color(n):
+    """Farbe aus der 256er-Palette"""
+    if n < 8:
+        return ANSI_BASIC[n]
+    if n < 16:
+        return ANSI_BRIGHT[n - 8]
+    if n < 232:
+        n -= 16
+        levels = [0, 95, 135, 175, 215, 255]
+        return '#%02x%02x%02x' % (levels[n // 36], levels[n // 6 % 6], levels[n % 6])
+    gray = 8 + (n - 232) * 10
+    return '#%02x%02x%02x' % (gray, gray, gray)
+
+class AnsiRenderer:
+    """Wandelt PTY-Output chunkweise in HTML; SGR-Zustand und angeschnittene Sequenzen bleiben erhalten.
+    
+    Jedes Fragment ist für sich gültiges HTML (Spans werden am Chunk-Ende geschlossen und
+    im nächsten Fragment mit dem gleichen Stil neu geöffnet), Fragmente lassen sich also
+    beliebig aneinanderhängen.
+    """
+    def __init__(self):
+        self.pending = ''
+        self.reset()
+    
+    def reset(self):
+        self.fg = self.bg = None  # Klassenname ('red') oder Farbe ('#rrggbb')
+        self.bold = self.dim = self.italic = self.underline = self.inverse = False
+    
+    def _sgr(self, params):
+        codes = [int(p) if p.isdigit() else 0 for p in params.replace(':', ';').split(';')]
+        i = 0
+        while i < len(codes):
+            code = codes[i]
+            if code == 0:
+                self.reset()
+            elif code == 1:
+                self.bold = True
+            elif code == 2:
+                self.dim = True
+            elif code == 3:
+                self.italic = True
+            elif code == 4:
+                self.underline = True
+            elif code == 7:
+                self.inverse = True
+            elif code == 22:
+                self.bold = self.dim = False
+            elif code == 23:
+                self.italic = False
+            elif code == 24:
+                self.underline = False
+            elif code == 27:
+                self.inverse = False
+            elif 30 <= code <= 37:
+                self.fg = ANSI_NAMES[code - 30]
+            elif 40 <= code <= 47:
+                self.bg = ANSI_BASIC[code - 40]
+            elif 90 <= code <= 97:
+                self.fg = ANSI_BRIGHT[code - 90]
+            elif 100 <= code <= 107:
+                self.bg = ANSI_BRIGHT[code - 100]
+            elif code == 39:
+                self.fg = None
+            elif code == 49:
+                self.bg = None
+            elif code in (38, 48) and i + 1 < len(codes):
+                color = None
+                if codes[i + 1] == 5 and i + 2 < len(codes):
+                    color = ansi_color(codes[i + 2] & 0xFF)
+                    i += 2
+                elif codes[i + 1] == 2 and i + 4 < len(codes):
+                    color = '#%02x%02x%02x' % tuple(c & 0xFF for c in codes[i + 2:i + 5])
+                    i += 4
+                if code == 38:
+                    self.fg = color
+                else:
+                    self.bg = color
+            i += 1
+    
+    def _span(self):
+        """Öffnendes Span-Tag für den aktuellen Stil oder '' für den Standardstil"""
+        classes, styles = [], []
+        fg, bg = self.fg, self.bg
+        if self.inverse:
+            fg_color = ANSI_BASIC[ANSI_NAMES.index(fg)] if fg in ANSI_NAMES else fg
+            fg, bg = bg or TERMINAL_BG, fg_color or TERMINAL_FG
+        if fg in ANSI_NAMES:
+            classes.append('ansi-' + fg)
+        elif fg:
+            styles.append('color:' + fg)
+        if bg:
+            styles.append('background:' + bg)
+        if self.bold:
+            classes.append('ansi-bold')
+        if self.dim:
+            classes.append('ansi-dim')
+        if self.italic:
+            classes.append('ansi-italic')
+        if self.underline:
+            classes.append('ansi-underline')
+        if not (classes or styles):
+            return ''
+        attrs = f' class="{" ".join(classes)}"' if classes else ''
+        if styles:
+            attrs += f' style="{";".join(styles)}"'
+        return f'<span{attrs}>'
+    
+    def _text(self, text, out):
+        text = ANSI_CONTROL.sub('', text)
+        if text:
+            span = self._span()
+            escaped = html.escape(text, quote=False)
+            out.append(f'{span}{escaped}</span>' if span else escaped)
+    
+    def _escape(self, m):
+        # Cursor-Bewegung und Löschen ergeben im fortlaufenden Log keinen Sinn
+        if m.group(2) == 'm':
+            self._sgr(m.group(1))
+    
+    def feed(self, text):
+        """Rendert einen Chunk; gibt das HTML-Fragment zurück"""
+        text = self.pending + text
+        self.pending = ''
+        out = []
+        pos = 0
+        while True:
+            esc = text.find('\x1b', pos)
+            if esc < 0:
+                self._text(text[pos:], out)
+                break
+            self._text(text[pos:esc], out)
+            m = ANSI_SEQUENCE.match(text, esc)
+            if m:
+                self._escape(m)
+                pos = m.end()
+            elif ANSI_PARTIAL.match(text, esc):
+                self.pending = text[esc:]
+                break
+            else:
+                pos = esc + 1  # unbekannte Sequenz: nur ESC verwerfen
+        return ''.join(out)
+
+# Läufe druckbarer Zeichen oder einzelne Steuerzeichen
+SCREEN_TEXT = re.compile(r'[^\x00-\x1f\x7f]+|[\x00-\x1f\x7f]')
+
+class ScreenLine:
+    __slots__ = ('chars', 'styles', 'seq', 'html')
+    
+    def __init__(self, cols, seq):
+        self.chars = [' '] * cols
+        self.styles = [''] * cols
+        self.seq = seq
+        self.html = None
+
+class TerminalScreen(AnsiRenderer):
+    """Virtuelles Terminal (VT100-Teilmenge) mit Scrollback, so groß wie das PTY des Imports.
+    
+    Zeilen sind über Scrollback und Bildschirm hinweg fortlaufend nummeriert und merken
+    sich die Sequenznummer ihrer letzten Änderung; changes(since) liefert nur die Zeilen,
+    die sich seit `since` geändert haben.
+    """
+    def __init__(self, cols=TERMINAL_COLS, rows=TERMINAL_ROWS, scrollback=SCROLLBACK_LINES, seq=0):
+        super().__init__()
+        self.cols = cols
+        self.rows = rows
+        self.seq_start = self.seq = seq
+        self.top = 0  # Nummer der obersten Bildschirmzeile
+        self.lines = [ScreenLine(cols, seq) for _ in range(rows)]
+        # (Zeilennummer, Seq beim Hinausscrollen, Seq der letzten Änderung, HTML)
+        self.scrollback = deque(maxlen=scrollback)
+        self.x = self.y = 0
+        self.saved = (0, 0)
+        self.style = ''
+    
+    def _sgr(self, params):
+        super()._sgr(params)
+        self.style = self._span()
+    
+    def _touch(self, y):
+        line = self.lines[y]
+        line.seq = self.seq
+        line.html = None
+        return line
+    
+    def _render(self, line):
+        """HTML einer Zeile, gecacht bis zur nächsten Änderung"""
+        if line.html is None:
+            n = len(line.chars)
+            while n and line.chars[n - 1] == ' ' and not line.styles[n - 1]:
+                n -= 1
+            out = []
+            i = 0
+            while i < n:
+                style = line.styles[i]
+                j = i
+                while j < n and line.styles[j] == style:
+                    j += 1
+                text = html.escape(''.join(line.chars[i:j]), quote=False)
+                out.append(f'{style}{text}</span>' if style else text)
+                i = j
+            line.html = ''.join(out)
+        return line.html
+    
+    def _linefeed(self):
+        if self.y < self.rows - 1:
+            self.y += 1
+            return
+        line = self.lines.pop(0)
+        self.scrollback.append((self.top, self.seq, line.seq, self._render(line)))
+        self.top += 1
+        self.lines.append(ScreenLine(self.cols, self.seq))
+    
+    def _erase(self, y, start, end):
+        line = self._touch(y)
+        for x in range(start, end):
+            line.chars[x] = ' '
+            line.styles[x] = ''
+    
+    def _text(self, text, out):
+        for m in SCREEN_TEXT.finditer(text):
+            run = m.group()
+            if run == '\n' or run == '\x0b' or run == '\x0c':
+                self._linefeed()
+            elif run == '\r':
+                self.x = 0
+            elif run == '\b':
+                self.x = max(0, min(self.x, self.cols - 1) - 1)
+            elif run == '\t':
+                self.x = min(self.cols - 1, (self.x // 8 + 1) * 8)
+            elif run >= ' ' and run != '\x7f':
+                # Druckbare Zeichen zeilenweise am Stück schreiben
+                while run:
+                    # Umbruch erst beim nächsten Zeichen hinter der letzten Spalte
+                    if self.x >= self.cols:
+                        self.x = 0
+                        self._linefeed()
+                    k = min(len(run), self.cols - self.x)
+                    line = self._touch(self.y)
+                    line.chars[self.x:self.x + k] = run[:k]
+                    line.styles[self.x:self.x + k] = [self.style] * k
+                    self.x += k
+                    run = run[k:]
+    
+    def _escape(self, m):
+        final = m.group(2)
+        if final is None:
+            code = m.group(0)[1:2]
+            if code == '7':
+                self.saved = (self.x, self.y)
+            elif code == '8':
+                self.x, self.y = self.saved
+            elif code in ('D', 'E'):
+                if code == 'E':
+                    self.x = 0
+                self._linefeed()
+            elif code == 'M':
+                if self.y > 0:
+                    self.y -= 1
+                else:
+                    self.lines.insert(0, ScreenLine(self.cols, self.seq))
+                    self.lines.pop()
+                    for y in range(self.rows):
+                        self._touch(y)
+            elif code == 'c':
+                self.reset()
+                self.style = ''
+                self.x = self.y = 0
+                for y in range(self.rows):
+                    self._erase(y, 0, self.cols)
+            return
+        params = m.group(1)
+        if final == 'm':
+            self._sgr(params)
+            return
+        if params[:1] in ('?', '>', '<', '='):
+            return  # private Modi (Cursor an/aus, Bracketed Paste, ...)
+        args = [int(p) if p.isdigit() else 0 for p in params.split(';')] if params else []
+        
+        def arg(i, default=1):
+            return args[i] if len(args) > i and args[i] else default
+        
+        n = arg(0)
+        x = min(self.x, self.cols - 1)
+        if final == 'A':
+            self.y = max(0, self.y - n)
+        elif final in ('B', 'e'):
+            self.y = min(self.rows - 1, self.y + n)
+        elif final in ('C', 'a'):
+            self.x = min(self.cols - 1, x + n)
+        elif final == 'D':
+            self.x = max(0, x - n)
+        elif final in ('E', 'F'):
+            self.x = 0
+            self.y = min(self.rows - 1, self.y + n) if final == 'E' else max(0, self.y - n)
+        elif final in ('G', '`'):
+            self.x = min(self.cols - 1, n - 1)
+        elif final == 'd':
+            self.y = min(self.rows - 1, n - 1)
+        elif final in ('H', 'f'):
+            self.y = min(self.rows - 1, arg(0) - 1)
+            self.x = min(self.cols - 1, arg(1) - 1)
+        elif final == 'J':
+            mode = arg(0, 0)
+            if mode == 0:
+                self._erase(self.y, x, self.cols)
+                rows = range(self.y + 1, self.rows)
+            elif mode == 1:
+                self._erase(self.y, 0, x + 1)
+                rows = range(self.y)
+            else:
+                rows = range(self.rows)
+            for y in rows:
+                self._erase(y, 0, self.cols)
+        elif final == 'K':
+            mode = arg(0, 0)
+            start, end = {0: (x, self.cols), 1: (0, x + 1)}.get(mode, (0, self.cols))
+            self._erase(self.y, start, end)
+        elif final in ('L', 'M'):
+            n = min(n, self.rows - self.y)
+            for _ in range(n):
+                if final == 'L':
+                    self.lines.insert(self.y, ScreenLine(self.cols, self.seq))
+                    self.lines.pop()
+                else:
+                    self.lines.pop(self.y)
+                    self.lines.append(ScreenLine(self.cols, self.seq))
+            for y in range(self.y, self.rows):
+                self._touch(y)
+        elif final in ('P', '@', 'X'):
+            n = min(n, self.cols - x)
+            line = self._touch(self.y)
+            blank_chars, blank_styles = [' '] * n, [''] * n
+            if final == 'P':
+                line.chars[x:] = line.chars[x + n:] + blank_chars
+                line.styles[x:] = line.styles[x + n:] + blank_styles
+            elif final == '@':
+                line.chars[x:] = (blank_chars + line.chars[x:])[:self.cols - x]
+                line.styles[x:] = (blank_styles + line.styles[x:])[:self.cols - x]
+            else:
+                line.chars[x:x + n] = blank_chars
+                line.styles[x:x + n] = blank_styles
+        elif final == 's':
+            self.saved = (self.x, self.y)
+        elif final == 'u':
+            self.x, self.y = self.saved
+    
+    def feed(self, text):
+        self.seq += 1
+        super().feed(text)
+    
+    def changes(self, since=None):
+        """Geänderte Zeilen seit Seq `since` als (Nummer, HTML); reset=True: komplette Ansicht"""
+        reset = since is None or not self.seq_start <= since <= self.seq
+        if reset:
+            since = -1
+        rows = []
+        for number, scrolled, changed, line_html in reversed(self.scrollback):
+            if scrolled <= since:
+                break  # früher hinausgescrollte Zeilen hat der Client schon im Endstand
+            if changed > since:
+                rows.append((number, line_html))
+        rows.reverse()
+        end = self.y + 1
+        for y, line in enumerate(self.lines):
+            if line.seq > since:
+                rows.append((self.top + y, self._render(line)))
+            if y >= end and self._render(line):
+                end = y + 1
+        return {
+            'seq': self.seq,
+            'reset': reset,
+            'first': self.scrollback[0][0] if self.scrollback else self.top,
+            'top': self.top,
+            'end': self.top + end,  # Zeilen ab hier sind leer und werden ausgeblendet
+            'rows': rows,
+        }
+
+def screen_html(changes):
+    """Zeilen aus TerminalScreen.changes() als Markup für die erste Ansicht"""
+    return ''.join(
+        f'<div class="term-line" id="L{number}"{" hidden" if number >= changes["end"] else ""}>{line_html}</div>'
+        for number, line_html in changes['rows'])
+
+class Inotify:
+    """Minimaler inotify-Wrapper über ctypes (nur Linux)"""
+    IN_MODIFY = 0x002
+    IN_ATTRIB = 0x004
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ISDIR = 0x40000000
+    WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+                  IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+    EVENT = struct.Struct('iIII')
+    
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 fehlgeschlagen')
+    
+    def add_watch(self, path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+        return wd if wd >= 0 else None
+    
+    def read(self):
+        """Liefert (wd, mask, name) für alle anstehenden Events"""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return events
+            pos = 0
+            while pos < len(data):
+                wd, mask, _, length = self.EVENT.unpack_from(data, pos)
+                pos += self.EVENT.size
+                name = data[pos:pos + length].rstrip(b'\0').decode('utf-8', errors='surrogateescape')
+                pos += length
+                events.append((wd, mask, name))
+
+class FolderIndex:
+    """Im Speicher gehaltener Index der Import-Ordner, per inotify inkrementell aktualisiert"""
+    
+    def __init__(self, root):
+        self.root = root
+        self.folders = {}
+        self.lock = threading.Lock()
+        # Serialisiert Scans aus dem Watcher-Thread und den ersten Scan aus einem Request
+        self.scan_lock = threading.RLock()
+        self.inotify = None
+        self.watches = {}
+        self.scanned = False
+        self.thread = None
+    
+    def _rel(self, path):
+        return os.path.relpath(path, self.root)
+    
+    def _scan_dir(self, path):
+        """Liest einen Ordner (nicht rekursiv) ein, aktualisiert seinen Eintrag und gibt Unterordner zurück"""
+        files = size = 0
+        newest = 0.0
+        subdirs = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.name.lower().endswith(AUDIO_EXTENSIONS):
+                            st = entry.stat()
+                            files += 1
+                            size += st.st_size
+                            newest = max(newest, st.st_mtime)
+                    except OSError:
+                        pass
+        except OSError:
+            pass
+        rel = self._rel(path)
+        with self.lock:
+            if files and rel != '.':
+                old = self.folders.get(rel)
+                entry = {'files': files, 'bytes': size, 'mtime': newest}
+                if old is None:
+                    # Erstmals gesehen: die letzte Schreibzeit steckt in der mtime
+                    entry['changed'] = min(newest, time.time())
+                elif (old['files'], old['bytes'], old['mtime']) != (files, size, newest):
+                    entry['changed'] = time.time()
+                else:
+                    entry['changed'] = old['changed']
+                self.folders[rel] = entry
+            else:
+                self.folders.pop(rel, None)
+        return subdirs
+    
+    def _scan_tree(self, path):
+        """Rekursiv einlesen und neue Ordner beobachten; gibt die gesehenen Ordner zurück"""
+        seen = set()
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            seen.add(self._rel(current))
+            if self.inotify:
+                # Für bereits beobachtete Ordner liefert inotify denselben wd zurück
+                wd = self.inotify.add_watch(current)
+                if wd is not None:
+                    self.watches[wd] = current
+            stack.extend(self._scan_dir(current))
+        return seen
+    
+    def _forget(self, path):
+        """Entfernt einen gelöschten Ordner samt Unterordnern"""
+        rel = self._rel(path)
+        with self.lock:
+            for key in [k for k in self.folders if k == rel or k.startswith(rel + os.sep)]:
+                del self.folders[key]
+        for wd in [wd for wd, p in self.watches.items() if p == path or p.startswith(path + os.sep)]:
+            del self.watches[wd]
+    
+    def reconcile(self):
+        """Vollständiger Abgleich per scandir (fängt verpasste Events ab)"""
+        with self.scan_lock:
+            if not os.path.isdir(self.root):
+                with self.lock:
+                    self.folders = {}
+                self.scanned = True
+                return
+            seen = self._scan_tree(self.root)
+            with self.lock:
+                for key in [k for k in self.folders if k not in seen]:
+                    del self.folders[key]
+            self.scanned = True
+    
+    def start(self):
+        if self.thread is None:
+            try:
+                self.inotify = Inotify()
+            except (OSError, AttributeError) as e:
+                print(f"inotify nicht verfügbar, nur periodischer Abgleich: {e}")
+                self.inotify = None
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+    
+    def _run(self):
+        interval = FOLDER_RECONCILE_INTERVAL if self.inotify else min(FOLDER_RECONCILE_INTERVAL, 30)
+        selector = selectors.DefaultSelector()
+        if self.inotify:
+            selector.register(self.inotify.fd, selectors.EVENT_READ)
+        next_reconcile = 0
+        while True:
+            timeout = max(next_reconcile - time.time(), 0)
+            if selector.get_map() and selector.select(timeout):
+                try:
+                    with self.scan_lock:
+                        self._handle_events(self.inotify.read())
+                except Exception as e:
+                    print(f"Error in folder index: {e}")
+            elif not selector.get_map():
+                time.sleep(timeout)
+            if time.time() >= next_reconcile:
+                try:
+                    self.reconcile()
+                except Exception as e:
+                    print(f"Error reconciling folder index: {e}")
+                next_reconcile = time.time() + interval
+    
+    def _handle_events(self, events):
+        dirty = set()
+        for wd, mask, name in events:
+            if mask & Inotify.IN_Q_OVERFLOW:
+                self.reconcile()
+                return
+            base = self.watches.get(wd)
+            if base is None:
+                continue
+            if mask & (Inotify.IN_DELETE_SELF | Inotify.IN_IGNORED):
+                self._forget(base)
+                continue
+            path = os.path.join(base, name) if name else base
+            if mask & Inotify.IN_ISDIR:
+                if mask & (Inotify.IN_CREATE | Inotify.IN_MOVED_TO):
+                    self._scan_tree(path)
+                elif mask & (Inotify.IN_DELETE | Inotify.IN_MOVED_FROM):
+                    self._forget(path)
+            else:
+                dirty.add(base)
+        # Pro Ordner nur einmal neu einlesen, egal wie viele Events
+        for path in dirty:
+            if os.path.isdir(path):
+                self._scan_dir(path)
+    
+    def snapshot(self):
+        """Kopie des Index: relativer Pfad -> Dateianzahl, Bytes, neueste mtime, letzte Änderung, stabil"""
+        if not self.scanned:
+            self.reconcile()
+        now = time.time()
+        with self.lock:
+            return {k: dict(v, stable=now - v['changed'] >= SETTLE_SECONDS) for k, v in self.folders.items()}
+    
+    def is_stable(self, folder):
+        """True, wenn der Ordner seit SETTLE_SECONDS unverändert ist (auto-m4b fertig geschrieben)"""
+        if not self.scanned:
+            self.reconcile()
+        with self.lock:
+            entry = self.folders.get(folder)
+            return entry is not None and time.time() - entry['changed'] >= SETTLE_SECONDS
+
+folder_index = FolderIndex(INPUT_DIR)
+
+def load_settings():
+    """Liest die in der UI geänderten Einstellungen"""
+    settings = {'auto_import': AUTO_IMPORT_DEFAULT, 'auto_seen': None}
+    try:
+        with open(SETTINGS_PATH, 'r', encoding='utf-8') as f:
+            settings.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+    if settings['auto_import'] not in AUTO_IMPORT_MODES:
+        settings['auto_import'] = 'off'
+    return settings
+
+def save_settings(settings):
+    tmp = SETTINGS_PATH + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(settings, f, indent=1)
+    os.replace(tmp, SETTINGS_PATH)
+
+class AutoImporter:
+    """Reiht neu aufgetauchte Ordner automatisch ein, sobald sie fertig geschrieben sind"""
+    INTERVAL = 5
+    
+    def __init__(self, index, queue):
+        self.index = index
+        self.queue = queue
+        self.lock = threading.Lock()
+        self.settings = load_settings()
+        self.thread = None
+    
+    @property
+    def mode(self):
+        return self.settings['auto_import']
+    
+    def set_mode(self, mode):
+        with self.lock:
+            if mode not in AUTO_IMPORT_MODES:
+                return
+            if self.settings['auto_import'] == 'off' and mode != 'off':
+                # Beim Einschalten gilt der vorhandene Bestand als bekannt, nur Neues wird eingereiht
+                self.settings['auto_seen'] = sorted(self.index.snapshot())
+            self.settings['auto_import'] = mode
+            save_settings(self.settings)
+    
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+    
+    def _run(self):
+        while True:
+            time.sleep(self.INTERVAL)
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Error in auto import: {e}")
+    
+    def check(self):
+        with self.lock:
+            if self.mode == 'off':
+                return
+            folders = self.index.snapshot()
+            if self.settings['auto_seen'] is None:
+                # Erster Lauf (per WEBIMPORT_AUTO_IMPORT eingeschaltet oder Einstellungen gelöscht):
+                # der Bestand gilt als bekannt und wird gespeichert, bevor irgendetwas eingereiht wird
+                self.settings['auto_seen'] = sorted(folders)
+                save_settings(self.settings)
+                return
+            seen = set(self.settings['auto_seen'])
+            queued = set(self.queue.folders())
+            candidates = [f for f, info in sorted(folders.items()) if f not in seen and info['stable']]
+            new = [f for f in candidates if f not in queued]
+            # Schon (von Hand) eingereihte Ordner gelten ebenfalls als bekannt, sonst würden sie
+            # nach dem Entfernen des Queue-Eintrags automatisch erneut eingereiht
+            already_queued = [f for f in candidates if f in queued]
+            # Verschwundene Ordner (importiert/gelöscht) vergessen, damit die Liste nicht wächst
+            still_there = seen & set(folders)
+            if new:
+                # Wahrscheinlich schon importierte Bücher nur vormerken, nie automatisch starten
+                prescan = prescanner.snapshot()
+                held = [f for f in new if self.mode == 'hold'
+                        or library_cache.find_duplicate(f, prescan.get(f))]
+                if held:
+                    self.queue.add(held, 'interactive', status='held')
+                if len(held) < len(new):
+                    self.queue.add([f for f in new if f not in held], self.mode)
+            if new or already_queued or still_there != seen:
+                self.settings['auto_seen'] = sorted(still_there | set(new) | set(already_queued))
+                save_settings(self.settings)
+
+auto_importer = AutoImporter(folder_index, import_queue)
+
+# --- MP4/M4B ---
+# Hörbücher sind 300 MB - 1 GB groß; gelesen werden nur die Box-Header und das moov-Atom
+
+class Mp4Error(Exception):
+    """Datei ist kein (vollständiges) MP4"""
+
+MP4_TEXT_TAGS = {
+    'title': (b'\xa9nam',),
+    'author': (b'\xa9ART', b'aART'),
+    'album': (b'\xa9alb',),
+    'narrator': (b'\xa9nrt', b'\xa9wrt'),
+    'asin': (b'----:ASIN', b'----:AUDIBLE_ASIN'),
+}
+MP4_COVER_TYPES = {13: 'image/jpeg', 14: 'image/png', 27: 'image/bmp'}
+
+def _mp4_boxes(buf, start, end):
+    """Iteriert (Typ, Payload-Anfang, Box-Ende) der Boxen zwischen start und end"""
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from('>I4s', buf, pos)
+        header = 8
+        if size == 1:
+            if pos + 16 > end:
+                raise Mp4Error(f"Box {kind!r} abgeschnitten")
+            size = struct.unpack_from('>Q', buf, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise Mp4Error(f"Box {kind!r} bei {pos} ungültig (Datei unvollständig?)")
+        yield kind, pos + header, pos + size
+        pos += size
+
+def _mp4_find(buf, start, end, *path):
+    """Erste Box entlang path als (Payload-Anfang, Box-Ende) oder None"""
+    for kind, payload, box_end in _mp4_boxes(buf, start, end):
+        if kind != path[0]:
+            continue
+        if len(path) == 1:
+            return payload, box_end
+        # meta ist in iTunes-Dateien eine Full-Box (4 Byte Version/Flags vor den Kindern)
+        if kind == b'meta' and bytes(buf[payload + 4:payload + 8]) != b'hdlr':
+            payload += 4
+        return _mp4_find(buf, payload, box_end, *path[1:])
+    return None
+
+def _mp4_full_box(buf, box, v0_offset, v1_offset, v0_fmt, v1_fmt):
+    """Liest Felder einer versionierten Box (mvhd, mdhd, tkhd)"""
+    if buf[box[0]] == 1:
+        return struct.unpack_from(v1_fmt, buf, box[0] + v1_offset)
+    return struct.unpack_from(v0_fmt, buf, box[0] + v0_offset)
+
+def _mp4_table(buf, box, fmt, header=8):
+    """Einträge einer Sample-Tabelle (stts, stsc, stco, ...) nach Version/Flags und Anzahl"""
+    count = struct.unpack_from('>I', buf, box[0] + header - 4)[0]
+    size = struct.calcsize(fmt)
+    if box[0] + header + count * size > box[1]:
+        raise Mp4Error("Sample-Tabelle abgeschnitten")
+    return [struct.unpack_from(fmt, buf, box[0] + header + i * size) for i in range(count)]
+
+def _mp4_chpl(buf, box):
+    """Nero-Kapitel (moov/udta/chpl), Startzeiten in 100 ns"""
+    start, end = box
+    pos = start + (9 if buf[start] == 1 else 5)
+    chapters = []
+    for _ in range(buf[pos - 1]):
+        if pos + 9 > end:
+            break
+        ts, length = struct.unpack_from('>QB', buf, pos)
+        pos += 9
+        chapters.append({'start': ts / 10000000,
+                         'title': bytes(buf[pos:pos + length]).decode('utf-8', 'replace')})
+        pos += length
+    return chapters
+
+def _mp4_chapter_track(buf, moov):
+    """QuickTime-Kapitel: Text-Track, auf den ein anderer Track per tref/chap verweist"""
+    tracks, chapter_ids = {}, set()
+    for kind, payload, box_end in _mp4_boxes(buf, *moov):
+        if kind != b'trak':
+            continue
+        tkhd = _mp4_find(buf, payload, box_end, b'tkhd')
+        if tkhd:
+            tracks[_mp4_full_box(buf, tkhd, 12, 20, '>I', '>I')[0]] = (payload, box_end)
+        chap = _mp4_find(buf, payload, box_end, b'tref', b'chap')
+        if chap:
+            chapter_ids.update(struct.unpack_from(f'>{(chap[1] - chap[0]) // 4}I', buf, chap[0]))
+    for track_id in chapter_ids:
+        trak = tracks.get(track_id)
+        mdhd = trak and _mp4_find(buf, *trak, b'mdia', b'mdhd')
+        stbl = trak and _mp4_find(buf, *trak, b'mdia', b'minf', b'stbl')
+        if not (mdhd and stbl):
+            continue
+        timescale = _mp4_full_box(buf, mdhd, 12, 20, '>I', '>I')[0] or 1
+        tables = {kind: (payload, box_end) for kind, payload, box_end in _mp4_boxes(buf, *stbl)}
+        if not all(k in tables for k in (b'stts', b'stsz', b'stsc')) or not (b'stco' in tables or b'co64' in tables):
+            continue
+        durations = [d for count, d in _mp4_table(buf, tables[b'stts'], '>II') for _ in range(count)]
+        fixed_size, count = struct.unpack_from('>II', buf, tables[b'stsz'][0] + 4)
+        sizes = [fixed_size] * count if fixed_size else [s for (s,) in _mp4_table(buf, tables[b'stsz'], '>I', 12)]
+        stsc = _mp4_table(buf, tables[b'stsc'], '>III')
+        offsets = ([o for (o,) in _mp4_table(buf, tables[b'stco'], '>I')] if b'stco' in tables
+                   else [o for (o,) in _mp4_table(buf, tables[b'co64'], '>Q')])
+        # Sample-Offsets aus Chunks und Samples pro Chunk
+        samples = []
+        for chunk, chunk_offset in enumerate(offsets, 1):
+            per_chunk = next((n for first, n, _ in reversed(stsc) if first <= chunk), 0)
+            for _ in range(per_chunk):
+                if len(samples) == len(sizes):
+                    break
+                samples.append(chunk_offset)
+                chunk_offset += sizes[len(samples) - 1]
+        chapters, t = [], 0
+        for offset, duration in zip(samples, durations):
+            length = struct.unpack_from('>H', buf, offset)[0] if offset + 2 <= len(buf) else 0
+            raw = bytes(buf[offset + 2:offset + 2 + length])
+            title = raw.decode('utf-16') if raw[:2] in (b'\xfe\xff', b'\xff\xfe') else raw.decode('utf-8', 'replace')
+            chapters.append({'start': t / timescale, 'title': title})
+            t += duration
+        return chapters
+    return []
+
+def read_mp4(path):
+    """Tags, Dauer, Bitrate, Kapitel und Cover-Position einer MP4/M4B-Datei per mmap"""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < 8:
+            raise Mp4Error("Datei zu klein")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            moov, media = None, 0
+            for kind, payload, box_end in _mp4_boxes(buf, 0, size):
+                if kind == b'moov':
+                    moov = (payload, box_end)
+                elif kind == b'mdat':
+                    media += box_end - payload
+            if moov is None:
+                raise Mp4Error("kein moov-Atom")
+            mvhd = _mp4_find(buf, *moov, b'mvhd')
+            if not mvhd:
+                raise Mp4Error("kein mvhd-Atom")
+            timescale, duration = _mp4_full_box(buf, mvhd, 12, 20, '>II', '>IQ')
+            info = {'title': '', 'author': '', 'album': '', 'narrator': '', 'asin': '',
+                    'duration': duration / timescale if timescale else 0,
+                    'bitrate': 0, 'chapters': [], 'cover': None}
+            if info['duration']:
+                info['bitrate'] = int(media * 8 / info['duration'])
+            
+            ilst = _mp4_find(buf, *moov, b'udta', b'meta', b'ilst')
+            values = {}
+            for kind, payload, box_end in _mp4_boxes(buf, *ilst) if ilst else ():
+                data = _mp4_find(buf, payload, box_end, b'data')
+                if kind == b'----':
+                    # Freeform-Tag (mean/name/data), z.B. com.apple.iTunes:ASIN
+                    name = _mp4_find(buf, payload, box_end, b'name')
+                    kind = b'----:' + bytes(buf[name[0] + 4:name[1]]) if name else kind
+                if data and kind not in values:
+                    # data: 4 Byte Typ, 4 Byte Locale, dann der Wert
+                    values[kind] = (struct.unpack_from('>I', buf, data[0])[0] & 0xFFFFFF, data[0] + 8, data[1])
+            for field, keys in MP4_TEXT_TAGS.items():
+                for key in keys:
+                    if key in values:
+                        _, start, end = values[key]
+                        info[field] = bytes(buf[start:end]).decode('utf-8', 'replace')
+                        break
+            if b'covr' in values:
+                kind, start, end = values[b'covr']
+                info['cover'] = {'offset': start, 'length': end - start,
+                                 'mime': MP4_COVER_TYPES.get(kind, 'image/jpeg')}
+            
+            chpl = _mp4_find(buf, *moov, b'udta', b'chpl')
+            info['chapters'] = _mp4_chpl(buf, chpl) if chpl else _mp4_chapter_track(buf, moov)
+            return info
+
+def read_mp4_cover(path):
+    """Eingebettetes Cover als (Bytes, MIME-Typ) oder None"""
+    cover = read_mp4(path)['cover']
+    if not cover:
+        return None
+    with open(path, 'rb') as f:
+        f.seek(cover['offset'])
+        return f.read(cover['length']), cover['mime']
+
+def bench_mp4(paths, rounds=5):
+    """Vergleicht read_mp4 mit mutagen (python webimport.py --bench-mp4 DATEI...)"""
+    for path in paths:
+        timings = {}
+        for name, reader in (('mmap', read_mp4), ('mutagen', mutagen.File)):
+            runs = []
+            for _ in range(rounds):
+                t = time.perf_counter()
+                reader(path)
+                runs.append(time.perf_counter() - t)
+            timings[name] = sorted(runs)[rounds // 2]
+        print(f"{os.path.basename(path)}: mmap {timings['mmap'] * 1000:.2f} ms, "
+              f"mutagen {timings['mutagen'] * 1000:.2f} ms "
+              f"({timings['mutagen'] / timings['mmap']:.1f}x)")
+
+# Tag-Schlüssel je Format: MP4-Atome bzw. ID3-Frames
+MP4_TAGS = {'title': '\xa9nam', 'author': '\xa9ART', 'album': '\xa9alb', 'narrator': '\xa9wrt'}
+ID3_TAGS = {'title': 'TIT2', 'author': 'TPE1', 'album': 'TALB', 'narrator': 'TCOM', 'asin': 'TXXX:ASIN'}
+
+def scan_audio_file(path):
+    """Liest Tags, Dauer, Bitrate, Kapitel und Cover einer Datei (läuft im Prozess-Pool)"""
+    info = {'title': '', 'author': '', 'album': '', 'narrator': '', 'asin': '',
+            'duration': 0, 'bitrate': 0, 'chapters': 0, 'cover': False}
+    if path.lower().endswith(('.m4b', '.m4a')):
+        try:
+            mp4 = read_mp4(path)
+            return dict(mp4, chapters=len(mp4['chapters']), cover=bool(mp4['cover']))
+        except (Mp4Error, OSError, ValueError, struct.error):
+            pass
+    try:
+        f = mutagen.File(path)
+    except Exception as e:
+        return dict(info, error=str(e))
+    if f is None:
+        return dict(info, error='unbekanntes Format')
+    info['duration'] = getattr(f.info, 'length', 0) or 0
+    info['bitrate'] = getattr(f.info, 'bitrate', 0) or 0
+    tags = f.tags or {}
+    if isinstance(f, mutagen.mp4.MP4):
+        for field, key in MP4_TAGS.items():
+            if tags.get(key):
+                info[field] = str(tags[key][0])
+        info['cover'] = bool(tags.get('covr'))
+        info['chapters'] = len(f.chapters or [])
+    else:
+        for field, key in ID3_TAGS.items():
+            if key in tags:
+                info[field] = str(tags[key])
+        info['cover'] = bool(tags.getall('APIC')) if hasattr(tags, 'getall') else False
+        info['chapters'] = len(tags.getall('CHAP')) if hasattr(tags, 'getall') else 0
+    return info
+
+def _prescan_worker_init():
+    # Der Import im Vordergrund hat Vorrang
+    os.nice(10)
+
+class PreScanner:
+    """Liest Eckdaten aller Audio-Dateien fertiger Ordner vorab ein (Prozess-Pool, Cache nach Pfad/Größe/mtime)"""
+    INTERVAL = 5
+    
+    def __init__(self, index, path):
+        self.index = index
+        self.path = path
+        self.lock = threading.Lock()
+        self.files = self._load()
+        self.summaries = {}
+        self.signatures = {}
+        self.pool = None
+        self.thread = None
+    
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.files, f)
+        os.replace(tmp, self.path)
+    
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+    
+    def _run(self):
+        while True:
+            try:
+                self.scan()
+            except Exception as e:
+                print(f"Error in prescan: {e}")
+            time.sleep(self.INTERVAL)
+    
+    def _list_files(self, folder):
+        """Audio-Dateien eines Ordners mit (Größe, mtime)"""
+        files = {}
+        path = os.path.join(self.index.root, folder)
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.lower().endswith(AUDIO_EXTENSIONS):
+                        st = entry.stat()
+                        files[entry.path] = [st.st_size, st.st_mtime]
+        except OSError:
+            pass
+        return files
+    
+    def scan(self):
+        """Scannt geänderte, fertig geschriebene Ordner; jede Datei wird nur einmal geparst"""
+        folders = self.index.snapshot()
+        todo = {}
+        for folder, info in folders.items():
+            signature = (info['files'], info['bytes'], info['mtime'])
+            if info['stable'] and self.signatures.get(folder) != signature:
+                todo[folder] = (signature, self._list_files(folder))
+        missing = {p: key for _, files in todo.values() for p, key in files.items()
+                   if self.files.get(p, {}).get('key') != key}
+        if missing:
+            if self.pool is None:
+                # Ein dauerhafter Pool; forkserver statt fork, denn dieser Prozess hat Threads (PTY-Loop,
+                # SSE, inotify) und offene SQLite-Verbindungen, deren Locks ein fork-Kind erben würde
+                self.pool = ProcessPoolExecutor(PRESCAN_WORKERS, mp_context=multiprocessing.get_context('forkserver'),
+                                                initializer=_prescan_worker_init)
+            try:
+                results = list(self.pool.map(scan_audio_file, missing))
+            except BrokenProcessPool:
+                self.pool.shutdown(wait=False)
+                self.pool = None  # im nächsten Durchlauf neu aufbauen
+                raise
+            for (path, key), result in zip(missing.items(), results):
+                self.files[path] = {'key': key, 'info': result}
+        
+        with self.lock:
+            for folder, (signature, files) in todo.items():
+                self.summaries[folder] = self._summarize(files)
+                self.signatures[folder] = signature
+            for folder in [f for f in self.summaries if f not in folders]:
+                del self.summaries[folder]
+                del self.signatures[folder]
+        # Einträge verschwundener Ordner nicht ewig mitschleppen
+        root = self.index.root
+        known = {os.path.join(root, f) for f in folders}
+        stale = [p for p in self.files if os.path.dirname(p) not in known]
+        for p in stale:
+            del self.files[p]
+        if missing or stale:
+            self._save()
+    
+    def _summarize(self, files):
+        infos = [self.files[p]['info'] for p in sorted(files) if p in self.files]
+        ok = [i for i in infos if 'error' not in i]
+        duration = sum(i['duration'] for i in ok)
+        first = ok[0] if ok else {}
+        return {
+            'files': len(infos),
+            'errors': len(infos) - len(ok),
+            'duration': duration,
+            # Über die Dauer gewichtete Bitrate
+            'bitrate': sum(i['bitrate'] * i['duration'] for i in ok) / duration if duration else 0,
+            'chapters': sum(i['chapters'] for i in ok),
+            'cover': any(i['cover'] for i in ok),
+            'title': first.get('album') or first.get('title', ''),
+            'author': first.get('author', ''),
+            'narrator': first.get('narrator', ''),
+            'asin': first.get('asin', ''),
+        }
+    
+    def snapshot(self):
+        with self.lock:
+            return dict(self.summaries)
+
+prescanner = PreScanner(folder_index, PRESCAN_CACHE_PATH)
 
 def find_import_folders():
-    """Findet alle Ordner mit Audio-Dateien"""
-    folders = []
-    if os.path.isdir(INPUT_DIR):
-        for root, dirs, files in os.walk(INPUT_DIR):
-            if any(f.lower().endswith(('.m4b', '.m4a', '.mp3')) for f in files):
-                rel_path = os.path.relpath(root, INPUT_DIR)
-                if rel_path != '.':
-                    folders.append(rel_path)
-    return sorted(folders)
+    """Findet alle Ordner mit Audio-Dateien (aus dem Ordner-Index)"""
+    return sorted(folder_index.snapshot())
+
+@app.template_filter('filesize')
+def filesize_filter(num):
+    """Bytes als lesbare Größe"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if num < 1024 or unit == 'GB':
+            return f"{num:.0f} {unit}" if unit == 'B' else f"{num:.1f} {unit}"
+        num /= 1024
+
+@app.template_filter('hours')
+def hours_filter(seconds):
+    """Hörbuchlänge als H:MM h"""
+    m = int(round(seconds or 0)) // 60
+    return f"{m // 60}:{m % 60:02d} h"
+
+@app.template_filter('datetime')
+def datetime_filter(ts):
+    return time.strftime('%d.%m. %H:%M', time.localtime(ts)) if ts else '-'
 
 # --- Flask Routes ---
 
 @app.route('/')
 def index():
-    library = get_library_items()
+    library = library_cache.get()
     total = sum(len(albums) for albums in library.values())
+    running = sessions.running()
+    folder_info = folder_index.snapshot()
+    prescan = prescanner.snapshot()
+    duplicates = {}
+    for folder in folder_info:
+        match = library_cache.duplicates.match(folder, prescan.get(folder))
+        if match:
+            duplicates[folder] = match
     
     return render_template_string(
         TEMPLATE,
-        is_running=session.is_running(),
-        current_folder=session.current_folder,
-        folders=find_import_folders() if not session.is_running() else [],
-        library_items=library if not session.is_running() else {},
+        is_running=False,
+        import_sessions=sessions.all(),
+        running_folders={s.folder for s in running},
+        running_count=len(running),
+        max_sessions=sessions.max_sessions,
+        queue_items=import_queue.snapshot(),
+        prefetched=prefetcher.done,
+        http_cache=get_http_cache_stats(),
+        auto_import=auto_importer.mode,
+        auto_import_labels=AUTO_IMPORT_LABELS,
+        album_details_batch=ALBUM_DETAILS_BATCH,
+        queue_labels=QUEUE_LABELS,
+        folders=sorted(folder_info),
+        folder_info=folder_info,
+        prescan=prescan,
+        duplicates=duplicates,
         total_albums=total,
-        terminal_output=ansi_to_html(session.get_output()),
+        input_dir=INPUT_DIR
+    )
+
+QUEUE_LABELS = {
+    'queued': 'wartet',
+    'running': 'läuft',
+    'needs-input': 'braucht Eingabe',
+    'done': 'fertig',
+    'failed': 'fehlgeschlagen',
+    'needs-review': 'zur Prüfung',
+    'held': 'wartet auf Freigabe'
+}
+
+AUTO_IMPORT_LABELS = {
+    'off': 'Aus',
+    'interactive': 'Interaktiv',
+    'batch': 'Batch mit Prüfung',
+    'hold': 'Nur vormerken (Freigabe)'
+}
+
+@app.route('/next')
+def next_session():
+    """Springt zur nächsten Session, die Eingabe braucht (automatisches Weiterschalten)"""
+    sess = sessions.next_session()
+    if sess is None:
+        return redirect(url_for('index'))
+    return redirect(url_for('session_view', session_id=sess.id))
+
+@app.route('/queue/add', methods=['POST'])
+def queue_add():
+    """Reiht die ausgewählten Ordner ein"""
+    folders = [f for f in request.form.getlist('folders') if f]
+    mode = 'batch' if request.form.get('mode') == 'batch' else 'interactive'
+    if folders:
+        import_queue.add(folders, mode)
+    return redirect(url_for('index'))
+
+@app.route('/queue/batch_all', methods=['POST'])
+def queue_batch_all():
+    """Reiht alle Import-Ordner im Batch-Modus ein (z.B. nächtlich per curl -X POST)"""
+    import_queue.add(find_import_folders(), 'batch')
+    return redirect(url_for('index'))
+
+@app.route('/queue/approve/<item_id>')
+def queue_approve(item_id):
+    mode = 'batch' if request.args.get('mode') == 'batch' else 'interactive'
+    import_queue.approve(item_id, mode)
+    return redirect(url_for('index'))
+
+@app.route('/settings/auto_import', methods=['POST'])
+def settings_auto_import():
+    """Schaltet den Auto-Import um"""
+    auto_importer.set_mode(request.form.get('mode', 'off'))
+    return redirect(url_for('index'))
+
+@app.route('/queue/review/<item_id>')
+def queue_review(item_id):
+    import_queue.review(item_id)
+    return redirect(url_for('index'))
+
+@app.route('/queue/remove/<item_id>')
+def queue_remove(item_id):
+    import_queue.remove(item_id)
+    return redirect(url_for('index'))
+
+@app.route('/queue/retry/<item_id>')
+def queue_retry(item_id):
+    import_queue.retry(item_id)
+    return redirect(url_for('index'))
+
+@app.route('/queue/clear')
+def queue_clear():
+    import_queue.clear_finished()
+    return redirect(url_for('index'))
+
+@app.route('/api/queue')
+def api_queue():
+    """Warteschlange als JSON"""
+    return jsonify({'items': import_queue.snapshot()})
+
+@app.route('/session/<session_id>')
+def session_view(session_id):
+    """Terminal-Ansicht einer Import-Session"""
+    sess = sessions.get(session_id)
+    if sess is None or not sess.is_running():
+        return redirect(url_for('index'))
+    screen = sess.get_screen()
+    
+    return render_template_string(
+        TEMPLATE,
+        is_running=True,
+        session_id=sess.id,
+        current_folder=sess.current_folder,
+        terminal_output=screen_html(screen),
+        terminal_cursor=screen['seq'],
+        terminal_rows=TERMINAL_ROWS,
         input_dir=INPUT_DIR
     )
 
 @app.route('/terminal')
-def terminal():
-    """AJAX endpoint für Terminal-Updates"""
-    output = session.get_output()
+@app.route('/session/<session_id>/terminal')
+def terminal(session_id=None):
+    """AJAX endpoint für Terminal-Updates; mit ?since=N nur die seit Seq N geänderten Zeilen"""
+    sess = sessions.get(session_id) if session_id else sessions.current()
+    if sess is None:
+        return jsonify({'error': 'unknown session'}), 404
+    
+    since = request.args.get('since', type=int)
+    if since is None:
+        return jsonify({
+            'output': sess.get_output(),
+            'output_html': screen_html(sess.get_screen()),
+            'is_running': sess.is_running(),
+            'open_path': sess.pending_editor_path
+        })
+    
+    return jsonify(dict(
+        sess.get_screen(since),
+        is_running=sess.is_running(),
+        open_path=sess.pending_editor_path
+    ))
+
+@app.route('/api/library')
+def api_library():
+    """Seitenweise Artist-Liste als JSON"""
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 500)
+    sort = request.args.get('sort', 'name')
+    
+    library = library_cache.get()
+    names = list(library.keys())  # bereits alphabetisch sortiert
+    if sort == 'name_desc':
+        names.reverse()
+    elif sort == 'count':
+        names.sort(key=lambda n: -len(library[n]))
+    
+    return jsonify({
+        'total': len(names),
+        'offset': offset,
+        'artists': [{'name': n, 'count': len(library[n])} for n in names[offset:offset + limit]]
+    })
+
+@app.route('/api/artist/<path:name>/albums')
+def api_artist_albums(name):
+    """Alben eines Artists als JSON"""
+    albums = library_cache.get().get(name, [])
     return jsonify({
-        'output': output,
-        'output_html': ansi_to_html(output),
-        'is_running': session.is_running(),
-        'open_path': session.pending_editor_path
+        'artist': name,
+        'albums': [{k: a[k] for k in ('id', 'album', 'year', 'genre')} for a in albums]
     })
 
+def sse_event(event, data, event_id=None):
+    """Formatiert ein Server-Sent Event"""
+    msg = f"event: {event}\n"
+    if event_id is not None:
+        msg += f"id: {event_id}\n"
+    return msg + f"data: {json.dumps(data)}\n\n"
+
+@app.route('/terminal/stream')
+@app.route('/session/<session_id>/terminal/stream')
+def terminal_stream(session_id=None):
+    """SSE-Stream mit geänderten Terminal-Zeilen, Editor- und Exit-Events; setzt per Last-Event-ID fort"""
+    sess = sessions.get(session_id) if session_id else sessions.current()
+    if sess is None:
+        return '', 404
+    since = request.headers.get('Last-Event-ID', type=int)
+    if since is None:
+        since = request.args.get('since', type=int)
+    
+    def generate():
+        cursor = since
+        version = None
+        sent_editor = None
+        while True:
+            new_version = sess.wait_for_change(version, timeout=15)
+            if new_version == version:
+                yield ": keepalive\n\n"
+                continue
+            version = new_version
+            
+            screen = sess.get_screen(cursor)
+            if screen['rows'] or screen['reset']:
+                yield sse_event('screen', screen, screen['seq'])
+            cursor = screen['seq']
+            
+            open_path = sess.pending_editor_path
+            if open_path and open_path != sent_editor:
+                yield sse_event('editor', {'path': open_path}, cursor)
+            sent_editor = open_path
+            
+            if sess.exit_code is not None:
+                yield sse_event('exit', {'exit_code': sess.exit_code}, cursor)
+                return
+    
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/album_details')
+def album_details_batch():
+    """Details mehrerer Alben (?ids=1,2,3) in einer Abfrage; füllt den Album-Cache"""
+    ids = [int(i) for i in request.args.get('ids', '').split(',') if i.strip().isdigit()]
+    try:
+        details = load_album_details(ids[:ALBUM_DETAILS_BATCH])
+    except Exception as e:
+        print(f"Error getting album details: {e}")
+        details = {}
+    return jsonify({'albums': {str(k): v for k, v in details.items()}})
+
 @app.route('/album_details/<album_id>')
 def album_details(album_id):
     """AJAX endpoint für Album-Details"""
     details = get_album_details(album_id)
     return jsonify(details)
 
+@app.route('/album_cover/<album_id>')
+def album_cover(album_id):
+    """Cover eines Albums: Datei von fetchart oder das in der M4B eingebettete Bild"""
+    with library_db.snapshot() as conn:
+        album = query_albums(conn, "WHERE id = ?", (int(album_id),)).get(int(album_id))
+        directory = library_directory()
+        paths = [item_path(row[0], directory) for row in
+                 conn.execute("SELECT path FROM items WHERE album_id = ?", (int(album_id),))]
+    if album is None:
+        return '', 404
+    artpath = album.get('artpath') and item_path(album['artpath'], directory)
+    if artpath and os.path.exists(artpath):
+        with open(artpath, 'rb') as f:
+            data = f.read()
+        mime = 'image/png' if artpath.lower().endswith(b'.png') else 'image/jpeg'
+        return Response(data, mimetype=mime)
+    for path in paths:
+        if path.lower().endswith((b'.m4b', b'.m4a')):
+            try:
+                cover = read_mp4_cover(path)
+            except (Mp4Error, OSError, ValueError, struct.error):
+                continue
+            if cover:
+                return Response(cover[0], mimetype=cover[1])
+    return '', 404
+
 @app.route('/start/<path:folder>')
 def start_import(folder):
     """Startet einen neuen Import"""
-    if session.start_import(folder):
+    sess = sessions.start(folder)
+    if sess:
         time.sleep(0.5)
+        return redirect(url_for('session_view', session_id=sess.id))
     return redirect(url_for('index'))
 
 @app.route('/send', methods=['POST'])
-def send_input():
+@app.route('/session/<session_id>/send', methods=['POST'])
+def session_send(session_id=None):
     """Sendet Input an den Prozess (AJAX)"""
+    sess = sessions.get(session_id) if session_id else sessions.current()
+    if sess is None:
+        return '', 404
     text = request.form.get('text', '')
-    session.send_input(text)
+    sess.send_input(text)
     return '', 204
 
 @app.route('/abort')
-def abort():
-    """Bricht den laufenden Import ab"""
-    session.stop_import()
+@app.route('/session/<session_id>/abort')
+def session_abort(session_id=None):
+    """Bricht einen laufenden Import ab"""
+    sess = sessions.get(session_id) if session_id else sessions.current()
+    if sess is not None:
+        sess.stop_import()
     return redirect(url_for('index'))
 
 @app.route('/delete/<item_id>')
@@ -1252,13 +4574,14 @@ def edit_album():
         # Debug-Ausgabe
         print(f"Executing command: {' '.join(cmd)}")
         
-        result = subprocess.run(
-            cmd, 
-            env=env, 
-            timeout=10,
-            capture_output=True,
-            text=True
-        )
+        with db_write_lock():
+            result = subprocess.run(
+                cmd, 
+                env=env, 
+                timeout=10,
+                capture_output=True,
+                text=True
+            )
         
         # Debug-Ausgabe
         if result.returncode != 0:
@@ -1268,6 +4591,8 @@ def edit_album():
             
     except Exception as e:
         print(f"Error modifying album: {e}")
+    library_cache.invalidate()
+    album_details_cache.invalidate(album_id)
     
     return redirect(url_for('index'))
 
@@ -1277,26 +4602,74 @@ def library_stats():
     stats = get_library_stats()
     return f'<pre style="background:#0c0c0c;color:#00ff00;padding:20px;font-family:monospace">{stats}</pre><br><a href="/" style="color:#007acc">Zurück</a>'
 
+@app.route('/history')
+def history():
+    """Import-Verlauf, durchsuchbar nach Ordner und gewähltem Album"""
+    query = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 0, type=int), 0)
+    entries, total = import_history.search(query, page)
+    return render_template_string(
+        HISTORY_TEMPLATE,
+        entry=None,
+        entries=entries,
+        total=total,
+        query=query,
+        page=page,
+        pages=max(1, -(-total // HISTORY_PAGE_SIZE))
+    )
+
+@app.route('/history/<int:entry_id>')
+def history_entry(entry_id):
+    """Protokoll eines Imports, seitenweise"""
+    entry = import_history.get(entry_id)
+    if entry is None:
+        return redirect(url_for('history'))
+    page = max(request.args.get('page', 0, type=int), 0)
+    lines, has_more = import_history.transcript_page(entry, page)
+    return render_template_string(
+        HISTORY_TEMPLATE,
+        entry=entry,
+        transcript=transcript_html(lines),
+        page=page,
+        has_more=has_more
+    )
+
+@app.route('/history/<int:entry_id>/raw')
+def history_transcript_raw(entry_id):
+    """Komplettes Protokoll als Text (gestreamt)"""
+    entry = import_history.get(entry_id)
+    if entry is None:
+        return jsonify({'error': 'unknown entry'}), 404
+    return Response(import_history.read_transcript(entry), mimetype='text/plain; charset=utf-8')
+
 @app.route('/edit')
 def edit_yaml():
     """Zeigt die YAML zum Bearbeiten an"""
     path = request.args.get('path', '')
-    if not path or not os.path.isfile(path):
+    if not path or not editor_channel.is_waiting(path) or not os.path.isfile(path):
         return redirect(url_for('index'))
     with open(path, 'r', encoding='utf-8', errors='replace') as f:
         content = f.read()
     return render_template_string(EDIT_TEMPLATE, path=path, content=content)
 
+def redirect_after_edit(path):
+    """Gibt den Editor der Session frei und kehrt zu deren Terminal zurück"""
+    sess = sessions.find_editor(path)
+    if sess is None:
+        return redirect(url_for('index'))
+    sess.pending_editor_path = None
+    return redirect(url_for('session_view', session_id=sess.id))
+
 @app.route('/save_edit', methods=['POST'])
 def save_edit():
-    """Speichert YAML und setzt Fortsetzungssignal"""
+    """Speichert YAML und weckt den wartenden Editor-Helfer"""
     path = request.form.get('path', '')
     content = request.form.get('content', '')
-    if path:
+    if path and editor_channel.is_waiting(path) and sessions.find_editor(path) is not None:
         with open(path, 'w', encoding='utf-8') as f:
             f.write(content)
-        open(path + '.done', 'w').close()
-        session.pending_editor_path = None
+        editor_channel.release(path)
+        return redirect_after_edit(path)
     return redirect(url_for('index'))
 
 @app.route('/cancel_edit')
@@ -1304,10 +4677,20 @@ def cancel_edit():
     """Bricht Bearbeitung ab und lässt beets fortfahren"""
     path = request.args.get('path', '')
     if path:
-        open(path + '.done', 'w').close()
-        session.pending_editor_path = None
+        editor_channel.release(path)
+        return redirect_after_edit(path)
     return redirect(url_for('index'))
 
 if __name__ == '__main__':
+    if sys.argv[1:2] == ['--bench-mp4']:
+        bench_mp4(sys.argv[2:])
+        sys.exit(0)
     print("Starting Beets Web Terminal on port 5002...")
+    enable_library_wal()
+    editor_channel.start()
+    folder_index.start()
+    import_queue.start()
+    prefetcher.start()
+    auto_importer.start()
+    prescanner.start()
     app.run(host='0.0.0.0', port=5002, debug=False)
\ No newline at end of file